@@ -0,0 +1,270 @@
+"""
+Client-side cross-check of the /api/analytics aggregates.
+Raw merchants and alerts are streamed into columnar NumPy arrays, the overview,
+per-vertical and health-score figures are recomputed with vectorized group-bys, and
+each is compared with what the analytics endpoints report.
+
+    python -m tests.aggregates --local --dataset-size 1000000
+
+Requires numpy (pip install numpy).
+"""
+
+import argparse
+import json
+import sys
+from itertools import islice, repeat
+from operator import itemgetter
+
+from tests.streaming import iter_array_items
+
+BATCH_SIZE = 65_536
+DEFAULT_RTOL = 1e-9
+ROUNDED_ATOL = 0.005  # figures the API rounds to two decimals
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("The analytics cross-check requires numpy: pip install numpy")
+    return numpy
+
+
+class _Codes(dict):
+    """Category -> small integer code, assigned on first sight"""
+
+    def __missing__(self, key):
+        code = self[key] = len(self)
+        return code
+
+
+class MerchantColumns:
+    """Columnar view of the merchants list: one NumPy array per field used by analytics"""
+
+    NUMERIC = {"active_subscribers": "subscribers", "tpv": "tpv", "churn_rate": "churn", "monthly_growth": "growth"}
+
+    def __init__(self):
+        self.ids = []
+        self.kyc_codes = _Codes()
+        self.vertical_codes = _Codes()
+        self._chunks = {name: [] for name in ("kyc", "vertical", *self.NUMERIC.values())}
+
+    def _column(self, rows, field, dtype, default):
+        np = _numpy()
+        try:
+            return np.fromiter(map(itemgetter(field), rows), dtype, len(rows))
+        except KeyError:
+            return np.fromiter(map(dict.get, rows, repeat(field), repeat(default)), dtype, len(rows))
+
+    def extend(self, rows):
+        np = _numpy()
+        self.ids.extend(map(itemgetter("id"), rows))
+        for field, name in self.NUMERIC.items():
+            self._chunks[name].append(self._column(rows, field, np.float64, float("nan")))
+        for field, name, codes in (("kyc_status", "kyc", self.kyc_codes), ("vertical", "vertical", self.vertical_codes)):
+            values = map(dict.get, rows, repeat(field))
+            self._chunks[name].append(np.fromiter(map(codes.__getitem__, values), np.int32, len(rows)))
+
+    def finish(self):
+        np = _numpy()
+        for name, chunks in self._chunks.items():
+            setattr(self, name, np.concatenate(chunks) if chunks else np.empty(0))
+        del self._chunks
+        return self
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, field, value):
+        codes = self.kyc_codes if field == "kyc" else self.vertical_codes
+        if value not in codes:
+            return _numpy().zeros(len(self), dtype=bool)
+        return getattr(self, field) == codes[value]
+
+
+class Comparison:
+    def __init__(self, scope, name, expected, actual, ok, detail=""):
+        self.scope = scope
+        self.name = name
+        self.expected = expected
+        self.actual = actual
+        self.ok = ok
+        self.detail = detail
+
+    def __str__(self):
+        if self.ok:
+            return f"{self.scope}.{self.name} = {self.actual}"
+        return f"{self.scope}.{self.name}: API {self.actual!r}, recomputed {self.expected!r}{self.detail}"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _close(expected, actual, rtol, atol):
+    np = _numpy()
+    return bool(np.isclose(_number(actual), expected, rtol=rtol, atol=atol))
+
+
+def iter_batches(items, size=BATCH_SIZE):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class AggregateChecker:
+    """Recomputes analytics from raw lists fetched over `tester`'s transport"""
+
+    def __init__(self, tester, rtol=DEFAULT_RTOL):
+        self.tester = tester
+        self.rtol = rtol
+
+    def _get(self, endpoint):
+        response = self.tester.transport.request("GET", f"{self.tester.base_url}/{endpoint}")
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def _stream(self, endpoint):
+        response = self.tester.transport.request("GET", f"{self.tester.base_url}/{endpoint}", stream=True)
+        try:
+            response.raise_for_status()
+            yield from iter_array_items(self.tester.transport.iter_content(response))
+        finally:
+            response.close()
+
+    def load_merchants(self):
+        columns = MerchantColumns()
+        for batch in iter_batches(self._stream("merchants")):
+            columns.extend(batch)
+        return columns.finish()
+
+    def count_active_alerts(self):
+        return sum(1 for alert in self._stream("alerts") if alert.get("status") == "active")
+
+    def compare_overview(self, merchants, active_alerts, overview):
+        approved = merchants.mask("kyc", "approved")
+        expected = {
+            "total_merchants": (len(merchants), 0),
+            "pending_kyc": (int(merchants.mask("kyc", "pending").sum()), 0),
+            "total_subscribers": (float(merchants.subscribers.sum()), 0),
+            "total_tpv": (float(merchants.tpv.sum()), 0),
+            "avg_churn_rate": (float(merchants.churn.mean()) if len(merchants) else 0.0, ROUNDED_ATOL),
+            "active_merchants": (int((approved & (merchants.subscribers > 0)).sum()), 0),
+            "active_alerts": (active_alerts, 0),
+        }
+        if approved.any():
+            expected["monthly_growth"] = (float(merchants.growth[approved].mean()), 0.05)
+        results = []
+        for name, (value, atol) in expected.items():
+            if name not in overview:
+                continue
+            ok = _close(value, overview[name], self.rtol, atol)
+            results.append(Comparison("overview", name, round(value, 6) if isinstance(value, float) else value,
+                                      overview[name], ok))
+        return results
+
+    def compare_verticals(self, merchants, verticals):
+        np = _numpy()
+        groups = len(merchants.vertical_codes)
+        codes = merchants.vertical
+        # One bincount per metric gives every vertical's sum in a single vectorized pass
+        count = np.bincount(codes, minlength=groups)
+        sums = {name: np.bincount(codes, weights=getattr(merchants, name), minlength=groups)
+                for name in ("subscribers", "tpv", "churn", "growth")}
+        results = []
+        for row in verticals:
+            name = row.get("name")
+            code = merchants.vertical_codes.get(name)
+            n = int(count[code]) if code is not None else 0
+            expected = {
+                "merchants": (n, 0),
+                "subscribers": (float(sums["subscribers"][code]) if n else 0.0, 0),
+                "tpv": (float(sums["tpv"][code]) if n else 0.0, 0),
+                "avg_churn": (float(sums["churn"][code] / n) if n else 0.0, ROUNDED_ATOL),
+                "avg_growth": (float(sums["growth"][code] / n) if n else 0.0, ROUNDED_ATOL),
+            }
+            for field, (value, atol) in expected.items():
+                if field in row:
+                    ok = _close(value, row[field], self.rtol, atol)
+                    results.append(Comparison(f"verticals[{name}]", field, round(value, 6), row[field], ok))
+        return results
+
+    def compare_health_scores(self, merchants, analytics):
+        np = _numpy()
+        index = dict(zip(merchants.ids, range(len(merchants))))
+        positions = np.fromiter(map(index.get, map(itemgetter("id"), analytics), repeat(-1)), np.int64, len(analytics))
+        reported = np.fromiter((_number(row.get("health_score")) for row in analytics), np.float64, len(analytics))
+        known = positions >= 0
+        rows = positions[known]
+        # The formula test_result.md documents, kept here so the check does not share the stub's code
+        expected = 100 - merchants.churn[rows] * 2 + merchants.growth[rows] * 0.5
+        matches = np.isclose(reported[known], expected, rtol=self.rtol, atol=ROUNDED_ATOL)
+        results = []
+
+        unknown = int((~known).sum())
+        results.append(Comparison("merchants", "unknown_ids", 0, unknown, unknown == 0))
+        approved = int(merchants.mask("kyc", "approved").sum())
+        listed_approved = int((merchants.kyc[rows] == merchants.kyc_codes.get("approved", -1)).sum())
+        results.append(Comparison("merchants", "approved_count", approved, listed_approved,
+                                  listed_approved == approved and len(rows) == approved))
+        bad = np.flatnonzero(~matches)
+        detail = ""
+        if bad.size:
+            worst = bad[np.argmax(np.abs(reported[known][bad] - expected[bad]))]
+            detail = (f" ({bad.size} of {matches.size} wrong; worst {merchants.ids[rows[worst]]}: "
+                      f"API {reported[known][worst]:.4f}, recomputed {expected[worst]:.4f})")
+        results.append(Comparison("merchants", "health_scores_matching", int(matches.size), int(matches.sum()),
+                                  not bad.size, detail))
+        return results
+
+    def run(self):
+        """Fetch analytics, then the raw lists, and compare. Returns {scope: [Comparison]}"""
+        overview = self._get("analytics/overview")
+        verticals = self._get("analytics/verticals")
+        analytics = self._get("analytics/merchants")
+        merchants = self.load_merchants()
+        active_alerts = self.count_active_alerts()
+        return {
+            "overview": self.compare_overview(merchants, active_alerts, overview),
+            "verticals": self.compare_verticals(merchants, verticals),
+            "health_scores": self.compare_health_scores(merchants, analytics),
+        }
+
+
+def main(argv=None):
+    from backend_test import BASE_URL, APITester
+    from tests.stub_server import add_local_arguments, start_local_server
+    from tests.transport import HTTPTransport
+
+    parser = argparse.ArgumentParser(description="Cross-check /api/analytics against raw merchant data")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--rtol", type=float, default=DEFAULT_RTOL, help="Relative tolerance for sums")
+    parser.add_argument("--json", action="store_true", help="Print comparisons as JSON")
+    add_local_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = start_local_server(args)
+    base_url = server.base_url if server else args.base_url
+    with HTTPTransport() as transport:
+        results = AggregateChecker(APITester(base_url=base_url, transport=transport), rtol=args.rtol).run()
+    if server:
+        server.stop()
+
+    ok = all(c.ok for group in results.values() for c in group)
+    if args.json:
+        print(json.dumps({scope: [vars(c) for c in group] for scope, group in results.items()}, default=str, indent=2))
+    else:
+        for scope, group in results.items():
+            for comparison in group:
+                print(f"{'✅' if comparison.ok else '❌'} {comparison}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""
+Performance baseline store and regression gate for the SubversePay API tools.
+Each run's per-endpoint latency samples and throughput are saved under
+.perf-baselines/<commit>/, and a new run is compared with the runs stored for an
+earlier commit:
+
+- p95 latency: bootstrap confidence interval of the p95 ratio (new / baseline); a
+  regression needs the whole interval above 1 and at least --min-effect slowdown
+- throughput and suite wall-clock: the new run must fall inside the prediction
+  interval of the baseline runs (Student t), again with a --min-effect floor
+
+Both sides pool the samples of up to 30 stored runs: a backend_test run holds one
+sample per endpoint, so its per-endpoint p95 is only tested once 20+ runs are saved
+for each commit; until then only the "ALL requests" row and the suite metrics gate.
+
+    python backend_test.py --save-baseline                      # on main
+    python backend_test.py --compare-baseline                   # in CI: exit 1 on regression
+    python -m tests.baseline compare --against main
+    python -m tests.baseline list
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from tests.reporting import record_key
+
+DEFAULT_DIR = ".perf-baselines"
+SAMPLE_CAP = 500
+BOOTSTRAP_ROUNDS = 1000
+CONFIDENCE = 0.95
+MIN_EFFECT = 0.10
+MIN_SAMPLES = 20
+# backend_test stores one sample per endpoint and run, so per-endpoint tests pool many runs
+BASELINE_RUNS = 30
+POOL_CAP = 2500
+QUANTILE = 0.95
+ALL_REQUESTS = "ALL requests"
+
+# Two-sided 95% Student t critical values by degrees of freedom
+_T_975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+          10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 30: 2.042}
+
+
+def _t_critical(df):
+    eligible = [d for d in _T_975 if d <= df]
+    return _T_975[max(eligible)] if df <= 30 else 1.96
+
+
+def git_commit(cwd=None):
+    """Short HEAD commit, suffixed with -dirty when the tree has local changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=cwd, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def _clean(commit):
+    """`commit` without the -dirty suffix git_commit adds"""
+    return commit[:-len("-dirty")] if commit.endswith("-dirty") else commit
+
+
+def _ancestors(ref, limit=200):
+    try:
+        out = subprocess.run(["git", "rev-list", "--abbrev-commit", f"--max-count={limit}", ref],
+                             capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    return out.split()
+
+
+class _Samples:
+    """Reservoir of at most `cap` latencies plus exact counters"""
+
+    def __init__(self, cap, rng):
+        self.cap = cap
+        self.rng = rng
+        self.values = []
+        self.requests = 0
+        self.errors = 0
+
+    def add(self, value, ok=True):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        if value is None:
+            return
+        if len(self.values) < self.cap:
+            self.values.append(value)
+        else:
+            slot = self.rng.randrange(self.requests)
+            if slot < self.cap:
+                self.values[slot] = value
+
+
+class BaselineCollector:
+    """Result-recorder sink gathering per-endpoint latency samples for the store"""
+
+    def __init__(self, cap=SAMPLE_CAP, seed=0):
+        self.cap = cap
+        self._rng = random.Random(seed)
+        self.endpoints = {}
+        self._last_exchange = None
+
+    def _samples(self, key):
+        samples = self.endpoints.get(key)
+        if samples is None:
+            samples = self.endpoints[key] = _Samples(self.cap, self._rng)
+        return samples
+
+    def write(self, record):
+        # Consecutive records of one check share its request; count that request once
+        if record.get("exchange_id") == self._last_exchange or record.get("endpoint") is None:
+            return
+        self._last_exchange = record.get("exchange_id")
+        if record.get("cached"):
+            return
+        ok = record.get("error") is None and (record.get("status") or 0) < 500
+        for key in (record_key(record), ALL_REQUESTS):
+            self._samples(key).add(record.get("duration"), ok)
+
+    def close(self):
+        pass
+
+    def to_run(self, source, wall_clock):
+        requests = self.endpoints[ALL_REQUESTS].requests if ALL_REQUESTS in self.endpoints else 0
+        return new_run(source, {key: {"samples": s.values, "requests": s.requests, "errors": s.errors}
+                                for key, s in self.endpoints.items()},
+                       {"wall_clock": wall_clock, "throughput": requests / wall_clock if wall_clock else 0.0})
+
+
+def new_run(source, endpoints, metrics):
+    return {
+        "version": 1,
+        "source": source,
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "metrics": metrics,
+        "endpoints": endpoints,
+    }
+
+
+def run_from_load(result, cap=SAMPLE_CAP):
+    """Store a LoadResult: each histogram is reduced to `cap` evenly spaced quantiles"""
+    endpoints = {}
+    rows = list(result.stats.items()) + [(ALL_REQUESTS, result.total())]
+    for name, stats in rows:
+        if not stats.requests:
+            continue
+        n = min(cap, stats.histogram.total_count)
+        points = [(i + 0.5) / n * 100 for i in range(n)]
+        values = stats.histogram.percentiles(points)
+        endpoints[name] = {
+            "samples": [values[p] / 1_000_000 for p in points],
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "throughput": stats.requests / result.duration if result.duration else 0.0,
+        }
+    return new_run("load", endpoints, {})
+
+
+class BaselineStore:
+    """Runs as JSON files under <root>/<commit>/<timestamp>-<source>.json"""
+
+    def __init__(self, root=DEFAULT_DIR):
+        self.root = root
+
+    def save(self, run):
+        directory = os.path.join(self.root, run["commit"])
+        os.makedirs(directory, exist_ok=True)
+        stamp = "".join(c for c in run["recorded_at"] if c.isdigit() or c == "T")[:21]
+        path = os.path.join(directory, f"{stamp}-{run['source']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f)
+        return path
+
+    def commits(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+    def runs(self, commit, source):
+        """Runs stored for a commit, newest first"""
+        directory = os.path.join(self.root, commit)
+        if not os.path.isdir(directory):
+            return []
+        names = sorted((n for n in os.listdir(directory) if n.endswith(f"-{source}.json")), reverse=True)
+        runs = []
+        for name in names:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                runs.append(json.load(f))
+        return runs
+
+    def baseline(self, source, against=None, exclude=None, limit=BASELINE_RUNS):
+        """(commit, runs) for the nearest ancestor of `against` (default HEAD) with stored runs.
+
+        `exclude` leaves out a commit's runs with and without local changes alike, so
+        uncommitted code never becomes the baseline of the commit it was made on.
+        """
+        stored = set(self.commits())
+        excluded = _clean(exclude) if exclude else None
+        for commit in _ancestors(against or "HEAD"):
+            if commit == excluded:
+                continue
+            for candidate in (commit, f"{commit}-dirty"):
+                if candidate in stored:
+                    runs = self.runs(candidate, source)
+                    if runs:
+                        return candidate, runs[:limit]
+        return None, []
+
+
+def pool_runs(runs, cap=POOL_CAP, seed=0):
+    """One run whose endpoint samples and counters are those of all `runs`; metrics are the first run's"""
+    rng = random.Random(seed)
+    endpoints = {}
+    for run in runs:
+        for key, entry in run["endpoints"].items():
+            pooled = endpoints.setdefault(key, {"samples": [], "requests": 0, "errors": 0})
+            pooled["samples"].extend(entry.get("samples", []))
+            pooled["requests"] += entry.get("requests", 0)
+            pooled["errors"] += entry.get("errors", 0)
+            if "throughput" in entry and "throughput" not in pooled:
+                pooled["throughput"] = entry["throughput"]
+    for entry in endpoints.values():
+        if len(entry["samples"]) > cap:
+            entry["samples"] = rng.sample(entry["samples"], cap)
+    return {**runs[0], "endpoints": endpoints}
+
+
+def _quantile(values, q=QUANTILE):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _resampled_quantile(values, q, rng):
+    n = len(values)
+    # The q-quantile of a resample is its (n - rank + 1)-th largest value
+    k = n - max(math.ceil(q * n), 1) + 1
+    return heapq.nlargest(k, rng.choices(values, k=n))[-1]
+
+
+def bootstrap_ratio(baseline, current, q=QUANTILE, rounds=BOOTSTRAP_ROUNDS, confidence=CONFIDENCE, seed=0):
+    """Point estimate and percentile-bootstrap CI of quantile(current) / quantile(baseline)"""
+    rng = random.Random(seed)
+    ratios = []
+    for _ in range(rounds):
+        base = _resampled_quantile(baseline, q, rng)
+        if base > 0:
+            ratios.append(_resampled_quantile(current, q, rng) / base)
+    ratios.sort()
+    tail = (1 - confidence) / 2
+    low = ratios[int(tail * (len(ratios) - 1))]
+    high = ratios[int((1 - tail) * (len(ratios) - 1))]
+    return _quantile(current, q) / _quantile(baseline, q), low, high
+
+
+def prediction_interval(values):
+    """95% interval for one new observation from the distribution of `values`"""
+    mean = statistics.fmean(values)
+    spread = _t_critical(len(values) - 1) * statistics.stdev(values) * math.sqrt(1 + 1 / len(values))
+    return mean, mean - spread, mean + spread
+
+
+class Finding:
+    def __init__(self, key, metric, baseline, current, low, high, regression, note=""):
+        self.key = key
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+        self.low = low
+        self.high = high
+        self.regression = regression
+        self.note = note
+
+
+def compare(current, baseline_runs, min_effect=MIN_EFFECT, min_samples=MIN_SAMPLES):
+    """Findings for `current` (a run, or several pooled with pool_runs) against `baseline_runs`"""
+    findings = []
+    baseline = pool_runs(baseline_runs)
+    for key, entry in sorted(current["endpoints"].items()):
+        pooled = baseline["endpoints"].get(key, {}).get("samples", [])
+        samples = entry["samples"]
+        if len(pooled) < min_samples or len(samples) < min_samples:
+            findings.append(Finding(key, "p95", _quantile(pooled) if pooled else None,
+                                    _quantile(samples) if samples else None, None, None, False,
+                                    f"too few samples ({len(samples)} new, {len(pooled)} baseline)"))
+        else:
+            ratio, low, high = bootstrap_ratio(pooled, samples)
+            findings.append(Finding(key, "p95", _quantile(pooled), _quantile(samples), low, high,
+                                    low > 1 and ratio >= 1 + min_effect, f"x{ratio:.2f}"))
+        if "throughput" in entry:
+            findings.append(_scalar(key, "throughput", entry["throughput"],
+                                    [run["endpoints"][key]["throughput"] for run in baseline_runs
+                                     if "throughput" in run["endpoints"].get(key, {})], True, min_effect))
+
+    for metric, value in sorted(current["metrics"].items()):
+        history = [run["metrics"][metric] for run in baseline_runs if metric in run["metrics"]]
+        findings.append(_scalar("suite", metric, value, history, metric == "throughput", min_effect))
+    return findings
+
+
+def _scalar(key, metric, value, history, higher_is_better, min_effect):
+    if len(history) < 2:
+        return Finding(key, metric, history[0] if history else None, value, None, None, False,
+                       f"needs 2+ baseline runs ({len(history)})")
+    mean, low, high = prediction_interval(history)
+    if higher_is_better:
+        regression = value < low and value <= mean * (1 - min_effect)
+    else:
+        regression = value > high and value >= mean * (1 + min_effect)
+    return Finding(key, metric, mean, value, low, high, regression)
+
+
+def _format(metric, value):
+    if value is None:
+        return "-"
+    if metric == "throughput":
+        return f"{value:.1f}/s"
+    return f"{value * 1000:.1f}ms" if metric == "p95" else f"{value:.2f}s"
+
+
+def report(findings, baseline_commit, runs, current_runs=1):
+    print(f"📐 Baseline: {baseline_commit} ({runs} run(s)); current: {current_runs} run(s)")
+    header = f"{'Endpoint':<40}{'Metric':<12}{'Baseline':>11}{'Current':>11}{'95% CI':>22}  Result"
+    print(header)
+    print("-" * len(header))
+    skipped = [f for f in findings if f.low is None]
+    for f in findings:
+        if f.low is None and f.metric == "p95":
+            continue
+        if f.low is None:
+            interval = "-"
+        elif f.metric == "p95":
+            interval = f"x{f.low:.2f}..x{f.high:.2f}"
+        else:
+            interval = f"{_format(f.metric, f.low)}..{_format(f.metric, f.high)}"
+        result = "❌ REGRESSION" if f.regression else ("➖ " + f.note if f.note and f.low is None else "✅ ok")
+        print(f"{f.key:<40}{f.metric:<12}{_format(f.metric, f.baseline):>11}{_format(f.metric, f.current):>11}"
+              f"{interval:>22}  {result}")
+    if any(f.metric == "p95" for f in skipped):
+        print(f"➖ {sum(f.metric == 'p95' for f in skipped)} endpoint(s) without enough samples for a p95 test "
+              f"(needs {MIN_SAMPLES}+ on both sides: save {MIN_SAMPLES}+ backend_test runs per commit, "
+              f"or use load runs)")
+    regressions = [f for f in findings if f.regression]
+    if regressions:
+        print(f"\n❌ {len(regressions)} significant performance regression(s)")
+    return not regressions
+
+
+def gate(run, store, against=None, min_effect=MIN_EFFECT, stored=True):
+    """Compare a run, pooled with the other stored runs of its commit, with its baseline and print
+    the table; True when nothing regressed. `stored` says whether `run` is already in the store."""
+    commit, runs = store.baseline(run["source"], against, exclude=run["commit"])
+    if not runs:
+        print("📐 No stored baseline to compare against; skipping the performance gate")
+        return True
+    siblings = store.runs(run["commit"], run["source"])
+    current = (siblings if stored else [run] + siblings)[:BASELINE_RUNS]
+    return report(compare(pool_runs(current), runs, min_effect), commit, len(runs), len(current))
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run's timings in the baseline store (only when every check passed)")
+    parser.add_argument("--compare-baseline", action="store_true",
+                        help="Fail the run on a significant p95 or throughput regression. Per-endpoint p95 "
+                             f"pools this run with the runs stored for its commit and needs {MIN_SAMPLES}+ "
+                             "samples a side; one backend_test run gives one per endpoint")
+    parser.add_argument("--baseline-dir", default=DEFAULT_DIR, help="Baseline store directory")
+    parser.add_argument("--baseline-ref", default=None,
+                        help="Compare against the nearest stored ancestor of this git ref (default HEAD)")
+    parser.add_argument("--min-effect", type=float, default=MIN_EFFECT,
+                        help="Smallest relative slowdown that counts as a regression")
+
+
+def apply_baseline(args, run, passed=True):
+    """Save and/or gate a run per the --*-baseline flags; returns False on regression.
+
+    A run whose functional checks failed (`passed` False) is never saved.
+    """
+    store = BaselineStore(args.baseline_dir)
+    ok = True
+    if args.compare_baseline:
+        print()
+        ok = gate(run, store, args.baseline_ref, args.min_effect, stored=False)
+    if args.save_baseline:
+        if passed:
+            print(f"💾 Saved baseline run to {store.save(run)}")
+        else:
+            print("💾 Not saving a baseline run: functional checks failed")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and compare stored performance baselines")
+    parser.add_argument("command", choices=["list", "compare"])
+    parser.add_argument("--baseline-dir", default=DEFAULT_DIR)
+    parser.add_argument("--source", default="backend_test", choices=["backend_test", "load"])
+    parser.add_argument("--commit", default=None, help="Run to check (default: current commit)")
+    parser.add_argument("--against", default=None, help="Git ref whose nearest stored ancestor is the baseline")
+    parser.add_argument("--min-effect", type=float, default=MIN_EFFECT)
+    args = parser.parse_args(argv)
+    store = BaselineStore(args.baseline_dir)
+
+    if args.command == "list":
+        for commit in store.commits():
+            for run in store.runs(commit, args.source):
+                print(f"{commit:<20}{run['recorded_at']:<36}{len(run['endpoints']):>4} endpoints")
+        return 0
+
+    commit = args.commit or git_commit()
+    runs = store.runs(commit, args.source)
+    if not runs:
+        print(f"❌ No stored {args.source} run for {commit}")
+        return 2
+    return 0 if gate(runs[0], store, args.against, args.min_effect) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
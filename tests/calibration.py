@@ -0,0 +1,302 @@
+"""
+Client overhead calibration for the SubversePay API harness.
+Recorded responses are served by a zero-latency echo target - a separate process that
+answers each request with pre-built bytes - and the full APITester path is run against
+it, so the time measured is the harness's own: HTTP client, JSON decoding, validation,
+log_test output and the scheduler.
+
+    python -m tests.calibration --local --passes 20 --profile sample
+    python backend_test.py --local --calibrate      # overhead after the run's summary
+    python -m tests.load --local --calibrate        # a Client column next to percentiles
+
+The echo is fed from a cassette: backend_test echoes its --record/--replay cassette or
+else records the suite's reads in one extra quiet pass after the run, the load tool
+records one GET per catalogue route, and this module records the suite's reads unless
+--cassette names an existing recording. Those recording passes send no POST or PATCH,
+so calibrating never writes to the target a second time; against the echo the write
+checks get a quick 404 instead. Transport time includes loopback and the echo's own
+minimal request handling, so it is an upper bound for the client.
+
+The figure is reported on its own: after the backend_test summary, and as the Client
+column of the load tool. JSONL, Prometheus, baseline and soak latencies are left as
+measured.
+"""
+
+import argparse
+import contextlib
+import http
+import json
+import multiprocessing
+import os
+import socketserver
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from tests.cassette import CassettePlayer, CassetteRecorder, request_key
+from tests.profiling import ProfileSession, add_profile_arguments
+from tests.stub_server import add_local_arguments, start_local_server
+from tests.transport import HTTPTransport
+
+DEFAULT_PASSES = 5
+DEFAULT_CALLS = 30
+WARMUP_CALLS = 3
+
+_NOT_FOUND_BODY = b'{"success": false, "error": "Not recorded"}'
+_NOT_FOUND = (b'HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\n'
+              b'Content-Length: %d\r\nConnection: keep-alive\r\n\r\n' % len(_NOT_FOUND_BODY) + _NOT_FOUND_BODY)
+
+
+def _echo_key(method, target, body):
+    url = f"http://echo{target}"
+    if not body:
+        return request_key(method, url)
+    try:
+        return request_key(method, url, json=json.loads(body))
+    except ValueError:
+        return request_key(method, url, data=body)
+
+
+def _load_responses(path):
+    """Request key -> complete HTTP response bytes, plus a body-less fallback per method + path"""
+    exact, by_path = {}, {}
+    player = CassettePlayer(path)
+    try:
+        for key, entry, body in player.exchanges():
+            status = http.HTTPStatus(entry["status"])
+            head = [f"HTTP/1.1 {status.value} {status.phrase}"]
+            head += [f"{name}: {value}" for name, value in entry["headers"].items()]
+            head += [f"Content-Length: {len(body)}", "Connection: keep-alive", "", ""]
+            response = "\r\n".join(head).encode("latin-1") + bytes(body)
+            exact.setdefault(key, response)
+            by_path.setdefault(key.split(" #")[0], response)
+    finally:
+        player.close()
+    return exact, by_path
+
+
+def _serve_echo(path, connection):
+    exact, by_path = _load_responses(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                line = self.rfile.readline()
+                if not line.strip():
+                    return
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                length = 0
+                for header in iter(self.rfile.readline, b"\r\n"):
+                    if not header:
+                        return
+                    name, _, value = header.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                key = _echo_key(method, target, self.rfile.read(length) if length else b"")
+                self.wfile.write(exact.get(key) or by_path.get(key.split(" #")[0], _NOT_FOUND))
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    with Server(("127.0.0.1", 0), Handler) as server:
+        connection.send(server.server_address[1])
+        server.serve_forever()
+
+
+class EchoTarget:
+    """The echo server in a child process, so its work never competes with the harness"""
+
+    def __init__(self, cassette, base_url):
+        self.cassette = cassette
+        self._base_path = urlsplit(base_url).path.rstrip("/")
+        self._process = None
+        self.base_url = None
+
+    def __enter__(self):
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        self._process = context.Process(target=_serve_echo, args=(self.cassette, child), daemon=True)
+        self._process.start()
+        child.close()
+        self.base_url = f"http://127.0.0.1:{parent.recv()}{self._base_path}"
+        parent.close()
+        return self
+
+    def __exit__(self, *exc):
+        self._process.terminate()
+        self._process.join(timeout=5)
+
+
+class _ExchangeTimes:
+    """Recorder sink summing the transport time of each distinct request"""
+
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self._last_exchange = None
+
+    def write(self, record):
+        if record.get("exchange_id") == self._last_exchange or record.get("duration") is None:
+            return
+        self._last_exchange = record.get("exchange_id")
+        self.requests += 1
+        self.duration += record["duration"]
+
+    def close(self):
+        pass
+
+
+class Overhead:
+    """Client-side seconds per request, measured against the echo target"""
+
+    def __init__(self, total, transport, passes, requests):
+        self.total = total
+        self.transport = transport
+        self.passes = passes
+        self.requests = requests
+
+    @property
+    def harness(self):
+        return max(self.total - self.transport, 0.0)
+
+    def describe(self):
+        return (f"🧮 Client overhead: {self.total * 1000:.2f}ms per request (transport {self.transport * 1000:.2f}ms, "
+                f"harness {self.harness * 1000:.2f}ms; median of {self.passes} passes of {self.requests} requests "
+                f"against a zero-latency echo). Check times and the suite's wall-clock include all of it, "
+                f"recorded request latencies only its transport share")
+
+
+def suite_overhead(echo_url, passes=DEFAULT_PASSES):
+    """Run the whole check graph sequentially against the echo, as a real run would, output included"""
+    from backend_test import APITester
+    from tests.reporting import ResultRecorder
+
+    totals, transports, requests = [], [], 0
+    for index in range(passes + 1):
+        times = _ExchangeTimes()
+        with HTTPTransport() as transport, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            tester = APITester(base_url=echo_url, transport=transport, max_workers=1,
+                               recorder=ResultRecorder([times]))
+            started = time.perf_counter()
+            tester.run_checks(tester.build_graph())
+            wall = time.perf_counter() - started
+        if index == 0 or not times.requests:
+            continue  # warm-up pass: imports, first connections
+        totals.append(wall / times.requests)
+        transports.append(times.duration / times.requests)
+        requests = times.requests
+    return Overhead(statistics.median(totals), statistics.median(transports), passes, requests)
+
+
+def route_overhead(echo_url, endpoints, calls=DEFAULT_CALLS):
+    """Median seconds a load-test call to each endpoint spends in the client"""
+    from backend_test import APITester
+
+    overhead = {}
+    with HTTPTransport() as transport:
+        tester = APITester(base_url=echo_url, transport=transport, verbose=False)
+        for endpoint in endpoints:
+            durations = []
+            for index in range(WARMUP_CALLS + calls):
+                started = time.perf_counter()
+                tester.test_get_request(endpoint.path, params=endpoint.params)
+                if index >= WARMUP_CALLS:
+                    durations.append(time.perf_counter() - started)
+            overhead[endpoint.name] = statistics.median(durations)
+    return overhead
+
+
+class _ReadsOnly:
+    """Transport wrapper that refuses everything but GET, failing it like a network error"""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def request(self, method, url, **kwargs):
+        if method.upper() != "GET":
+            raise requests.exceptions.ConnectionError(f"{method} not sent while recording reads")
+        return self.transport.request(method, url, **kwargs)
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        return self.transport.iter_content(response, chunk_size)
+
+
+def record_suite(base_url, path):
+    """One quiet pass of every check against `base_url`, its GETs recorded to `path`"""
+    from backend_test import APITester
+
+    with CassetteRecorder(HTTPTransport(), path) as recorder:
+        tester = APITester(base_url=base_url, transport=_ReadsOnly(recorder), verbose=False)
+        tester.run_checks(tester.build_graph())
+
+
+def record_routes(base_url, endpoints, path):
+    """One GET per endpoint against `base_url`, recorded to `path`"""
+    with CassetteRecorder(HTTPTransport(), path) as transport:
+        for endpoint in endpoints:
+            transport.request("GET", f"{base_url.rstrip('/')}/{endpoint.path}", params=endpoint.params)
+
+
+def temporary_cassette():
+    """Path of a new scratch cassette file; the caller removes it"""
+    fd, path = tempfile.mkstemp(suffix=".cassette")
+    os.close(fd)
+    return path
+
+
+def add_calibration_arguments(parser):
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Measure the client's own overhead against a zero-latency echo and report it")
+    parser.add_argument("--calibration-passes", type=int, default=DEFAULT_PASSES,
+                        help="Echo passes the --calibrate median is taken over")
+
+
+def main(argv=None):
+    from backend_test import BASE_URL
+    from tests.load import ENDPOINTS
+
+    parser = argparse.ArgumentParser(description="Measure the API harness's own per-request overhead")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--cassette", help="Echo this recording instead of recording one suite pass")
+    parser.add_argument("--passes", type=int, default=DEFAULT_PASSES, help="Full suite passes against the echo")
+    parser.add_argument("--calls", type=int, default=DEFAULT_CALLS, help="Calls per route for the route table")
+    add_local_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    cassette = args.cassette or temporary_cassette()
+    base_url = args.base_url
+    try:
+        if not args.cassette:
+            server = start_local_server(args)
+            base_url = server.base_url if server else args.base_url
+            try:
+                record_suite(base_url, cassette)
+            finally:
+                if server:
+                    server.stop()
+        with EchoTarget(cassette, base_url) as echo, ProfileSession(args) as profile:
+            print(f"🔁 Zero-latency echo of {args.cassette or 'one recorded suite pass'} at {echo.base_url}")
+            overhead = suite_overhead(echo.base_url, args.passes)
+            routes = route_overhead(echo.base_url, ENDPOINTS, args.calls)
+    finally:
+        if not args.cassette:
+            os.unlink(cassette)
+
+    print()
+    print(f"{'Endpoint':<24}{'Client ms':>10}")
+    for name, seconds in routes.items():
+        print(f"{name:<24}{seconds * 1000:>10.3f}")
+    print()
+    print(overhead.describe())
+    profile.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Record/replay cassettes for the SubversePay API testing suite.
+CassetteRecorder wraps a live HTTPTransport and appends every exchange to a cassette
+file; CassettePlayer serves them back from a memory-mapped copy with no network.
+
+    python backend_test.py --record run.cassette      # against BASE_URL
+    python backend_test.py --replay run.cassette      # offline, deterministic
+
+Layout: an 8-byte magic, the offset and length of a JSON index (two little-endian
+uint64s), the raw response bodies back to back, then the index. The index maps a
+request key to the responses recorded for it, each pointing at its body by offset.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from tests.transport import RequestTiming, buffered_response
+
+_MAGIC = b"SPCASS01"
+_HEADER = struct.Struct("<8sQQ")
+
+# Headers describing the wire encoding, which no longer applies to the decoded body we store
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """Replay was asked for a request the cassette does not contain"""
+
+
+def _body_bytes(kwargs):
+    if kwargs.get("json") is not None:
+        return json.dumps(kwargs["json"], sort_keys=True, separators=(",", ":")).encode()
+    data = kwargs.get("data")
+    if data is None:
+        return b""
+    if isinstance(data, dict):
+        return urlencode(sorted(data.items())).encode()
+    return data.encode() if isinstance(data, str) else bytes(data)
+
+
+def request_key(method, url, params=None, **kwargs):
+    """'GET /api/merchants?kyc_status=approved #e3b0c442...' - host-independent and order-insensitive"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items() if v is not None)
+    path = parts.path.rstrip("/") or "/"
+    if query:
+        path = f"{path}?{urlencode(sorted(query))}"
+    digest = hashlib.sha256(_body_bytes(kwargs)).hexdigest()[:16]
+    return f"{method.upper()} {path} #{digest}"
+
+
+class RecordedTiming(RequestTiming):
+    """Timing of a replayed exchange: recorded phases, anchored at the replay clock"""
+
+    def __init__(self, started, timing):
+        super().__init__(started, timing["connect"], started + timing["connect"] + timing["ttfb"],
+                         started + timing["duration"], timing["request_bytes"], timing["response_bytes"])
+        self.body = timing["body"]
+
+    def finish_stream(self, finished, response_bytes):
+        # The recorded body phase already covers reading the stream
+        pass
+
+
+def _replayed_response(entry, body, url, started):
+    response = buffered_response(entry["status"], entry["headers"], body, url, RecordedTiming(started, entry["timing"]))
+    response.from_cassette = True
+    return response
+
+
+class CassetteRecorder:
+    """Transport wrapper that records each exchange made through `transport` to `path`.
+
+    Streamed responses are read in full before they are handed to the caller, so
+    recording trades the constant-memory validation of stream=True for a complete body.
+    """
+
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, 0, 0))
+        self._exchanges = {}
+        self._lock = threading.Lock()
+
+    def _store(self, key, entry, body):
+        with self._lock:
+            entry["offset"] = self._file.tell()
+            entry["length"] = len(body)
+            self._file.write(body)
+            self._exchanges.setdefault(key, []).append(entry)
+
+    def request(self, method, url, stream=False, **kwargs):
+        key = request_key(method, url, **kwargs)
+        try:
+            response = self.transport.request(method, url, stream=stream, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._store(key, {"error": str(e)}, b"")
+            raise
+        if stream:
+            body = b"".join(self.transport.iter_content(response))
+            response.timing.finish_stream(time.perf_counter(), len(body))
+            response.close()
+        else:
+            body = response.content
+        timing = response.timing.to_dict()
+        entry = {
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            "timing": {k: timing[k] for k in ("connect", "ttfb", "body", "duration", "request_bytes", "response_bytes")},
+        }
+        self._store(key, entry, body)
+        if stream:
+            return _replayed_response(entry, body, url, response.timing.started)
+        return response
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        if getattr(response, "from_cassette", False):
+            return response.iter_content(chunk_size)
+        return self.transport.iter_content(response, chunk_size)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def stats(self):
+        return self.transport.stats()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            index = json.dumps({"version": 1, "exchanges": self._exchanges}, separators=(",", ":")).encode()
+            offset = self._file.tell()
+            self._file.write(index)
+            self._file.seek(0)
+            self._file.write(_HEADER.pack(_MAGIC, offset, len(index)))
+            self._file.close()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CassettePlayer:
+    """Transport that serves recorded exchanges; an unrecorded request raises CassetteMiss.
+
+    Requests recorded several times are answered in recording order, then the last
+    response repeats. Timings report the recorded phases; with latency=True each
+    request also sleeps for its recorded duration, so wall-clock behaviour is kept too.
+    """
+
+    def __init__(self, path, latency=False):
+        self.path = path
+        self.latency = latency
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset, length = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or not offset:
+            self.close()
+            raise ValueError(f"{path} is not a complete cassette")
+        self._exchanges = json.loads(self._map[offset:offset + length])["exchanges"]
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def request(self, method, url, stream=False, **kwargs):
+        key = request_key(method, url, **kwargs)
+        entries = self._exchanges.get(key)
+        if not entries:
+            raise CassetteMiss(f"No recorded exchange for {key}")
+        with self._lock:
+            self._requests += 1
+            position = self._cursors.get(key, 0)
+            self._cursors[key] = position + 1
+        entry = entries[min(position, len(entries) - 1)]
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(entry["timing"]["duration"] if "timing" in entry else 0.0)
+        if "error" in entry:
+            raise requests.exceptions.ConnectionError(entry["error"])
+        body = self._map[entry["offset"]:entry["offset"] + entry["length"]]
+        return _replayed_response(entry, body, url, started)
+
+    def exchanges(self):
+        """(request key, entry, body) of every recorded response, errors excluded"""
+        for key, entries in self._exchanges.items():
+            for entry in entries:
+                if "error" not in entry:
+                    yield key, entry, self._map[entry["offset"]:entry["offset"] + entry["length"]]
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        return response.iter_content(chunk_size)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            requests_sent = self._requests
+        return {
+            "requests": requests_sent,
+            "connections": 0,
+            "reused": requests_sent,
+            "reuse_ratio": 1.0 if requests_sent else 0.0,
+            "connect_time": 0.0,
+            "protocol": "cassette",
+        }
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_cassette_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="PATH", help="Record every HTTP exchange to a cassette file")
+    group.add_argument("--replay", metavar="PATH", help="Serve requests from a cassette instead of the network")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="When replaying, sleep for each exchange's recorded duration")
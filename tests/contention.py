@@ -0,0 +1,303 @@
+"""
+Write-contention mode for the KYC and alert status endpoints.
+Fires concurrent PATCHes at one shared ID and at distinct IDs, at rising concurrency,
+then reads back the final state and checks it against what the writes could have
+produced. Reports write throughput and latency per concurrency level.
+
+    python -m tests.contention --local --levels 1,2,4,8,16,32 --writes 200
+    python -m tests.contention --resources kyc --invalid-ratio 0.2
+
+KYC contention runs on merchants the tool creates itself (there is no DELETE, so they
+stay behind). Alert contention uses existing alerts and restores their status afterwards.
+In the distinct-ID runs every writer owns one ID, so levels above the number of IDs
+available are capped at it.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+
+import requests
+
+from backend_test import BASE_URL
+from tests.histogram import LatencyHistogram
+from tests.stub_server import add_local_arguments, start_local_server
+from tests.transport import HTTPTransport
+
+# Fields a status PATCH may legitimately touch besides the status itself
+_VOLATILE_FIELDS = {"updated_at", "resolved_at"}
+
+
+class Resource:
+    def __init__(self, name, path, field, valid, invalid):
+        self.name = name
+        self.path = path
+        self.field = field
+        self.valid = valid
+        self.invalid = invalid
+
+
+RESOURCES = {
+    "kyc": Resource("kyc", "merchants/{id}/kyc", "kyc_status", ("approved", "rejected"), ("pending", "unknown")),
+    "alert": Resource("alert", "alerts/{id}", "status", ("active", "resolved"), ("dismissed", "")),
+}
+
+
+class Write:
+    __slots__ = ("target", "status", "valid", "started", "finished", "code", "echo")
+
+    def __init__(self, target, status, valid):
+        self.target = target
+        self.status = status
+        self.valid = valid
+        self.started = self.finished = None
+        self.code = None
+        self.echo = None
+
+    @property
+    def accepted(self):
+        return self.code is not None and 200 <= self.code < 300
+
+
+class LevelResult:
+    """Throughput, latency and correctness findings for one concurrency level"""
+
+    def __init__(self, resource, shared, concurrency):
+        self.resource = resource
+        self.shared = shared
+        self.concurrency = concurrency
+        self.histogram = LatencyHistogram()
+        self.writes = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.lost = []           # (id, final value) not explained by any surviving write
+        self.invalid = []        # invalid statuses the API accepted, or invalid final states
+        self.clobbered = []      # (id, field) changed by a status-only PATCH
+        self.stale_echo = 0      # 2xx responses echoing a status other than the one sent
+
+    @property
+    def throughput(self):
+        return self.writes / self.duration if self.duration else 0.0
+
+    @property
+    def correct(self):
+        return not (self.lost or self.invalid or self.clobbered or self.stale_echo)
+
+
+class ContentionTester:
+    def __init__(self, base_url, transport, seed=0):
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport
+        self._random = random.Random(seed)
+
+    def _request(self, method, path, **kwargs):
+        return self.transport.request(method, f"{self.base_url}/{path}", **kwargs)
+
+    def _data(self, method, path, **kwargs):
+        response = self._request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()["data"]
+
+    def create_merchants(self, count):
+        ids = []
+        for i in range(count):
+            merchant = self._data("POST", "merchants", json={
+                "name": f"Contention Test {i + 1}",
+                "vertical": "ISP",
+                "contact_email": f"contention{i + 1}@testcorp.com",
+                "contact_phone": "+91 9876543299",
+            })
+            ids.append(merchant["id"])
+        return ids
+
+    def snapshot(self, resource, ids):
+        if resource.name == "kyc":
+            return {merchant_id: self._data("GET", f"merchants/{merchant_id}") for merchant_id in ids}
+        wanted = set(ids)
+        return {a["id"]: a for a in self._data("GET", "alerts") if a["id"] in wanted}
+
+    def _plan(self, resource, ids, writes, invalid_ratio, shared, concurrency):
+        """Per-worker write lists; with shared=False each worker owns one ID (needs concurrency <= len(ids))"""
+        plans = [[] for _ in range(concurrency)]
+        for i in range(writes):
+            worker = i % concurrency
+            target = ids[0] if shared else ids[worker]
+            if self._random.random() < invalid_ratio:
+                plans[worker].append(Write(target, self._random.choice(resource.invalid), False))
+            else:
+                plans[worker].append(Write(target, self._random.choice(resource.valid), True))
+        return plans
+
+    def _send(self, resource, write):
+        write.started = time.perf_counter()
+        try:
+            response = self._request("PATCH", resource.path.format(id=write.target), json={"status": write.status})
+            write.code = response.status_code
+            if write.accepted:
+                write.echo = response.json().get("data", {}).get(resource.field)
+        except (requests.exceptions.RequestException, ValueError):
+            write.code = None
+        write.finished = time.perf_counter()
+
+    def run_level(self, resource, ids, concurrency, writes, invalid_ratio=0.1, shared=True):
+        before = self.snapshot(resource, ids)
+        plans = self._plan(resource, ids, writes, invalid_ratio, shared, concurrency)
+        barrier = threading.Barrier(concurrency)
+
+        def worker(plan):
+            barrier.wait()
+            for write in plan:
+                self._send(resource, write)
+
+        threads = [threading.Thread(target=worker, args=(plan,), daemon=True) for plan in plans]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - start
+
+        result = LevelResult(resource, shared, concurrency)
+        result.duration = duration
+        for write in (w for plan in plans for w in plan):
+            result.writes += 1
+            result.histogram.record_seconds(write.finished - write.started)
+            if write.code is None or write.code >= 500 or (write.valid and not write.accepted):
+                result.errors += 1
+            if write.accepted and not write.valid:
+                result.invalid.append((write.target, f"accepted {resource.field}={write.status!r}"))
+            if write.accepted and write.valid and write.echo != write.status:
+                result.stale_echo += 1
+        self._verify(result, before, self.snapshot(resource, ids), plans)
+        return result
+
+    def _verify(self, result, before, after, plans):
+        """Check every final state is one a linearizable last-writer-wins register allows"""
+        field = result.resource.field
+        by_target = {}
+        for write in (w for plan in plans for w in plan):
+            if write.accepted and write.valid:
+                by_target.setdefault(write.target, []).append(write)
+        for target, original in before.items():
+            final = after.get(target)
+            if final is None:
+                result.lost.append((target, "record disappeared"))
+                continue
+            value = final.get(field)
+            accepted = by_target.get(target, [])
+            if value not in result.resource.valid and value != original.get(field):
+                result.invalid.append((target, f"final {field}={value!r}"))
+            elif accepted:
+                # The final value must come from a write that no write of another value followed
+                latest_other = max((w.started for w in accepted if w.status != value), default=float("-inf"))
+                if not any(w.status == value and w.finished >= latest_other for w in accepted):
+                    result.lost.append((target, f"final {field}={value!r} overwritten by a later write"))
+            elif value != original.get(field):
+                result.lost.append((target, f"{field} changed to {value!r} without an accepted write"))
+            for key, old in original.items():
+                if key != field and key not in _VOLATILE_FIELDS and final.get(key) != old:
+                    result.clobbered.append((target, key))
+
+    def restore(self, resource, states):
+        for target, record in states.items():
+            try:
+                self._request("PATCH", resource.path.format(id=target), json={"status": record[resource.field]})
+            except requests.exceptions.RequestException:
+                pass
+
+
+def report(results):
+    header = (f"{'Resource':<10}{'Target':<10}{'Conc':>5}{'Writes':>8}{'WPS':>9}{'p50':>10}{'p99':>10}"
+              f"{'Err%':>7}{'Lost':>6}{'Invalid':>9}{'Clobber':>9}{'Stale':>7}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        values = r.histogram.percentiles((50, 99))
+        print(f"{r.resource.name:<10}{'shared' if r.shared else 'distinct':<10}{r.concurrency:>5}{r.writes:>8}"
+              f"{r.throughput:>9.1f}{values[50] / 1000:>8.1f}ms{values[99] / 1000:>8.1f}ms"
+              f"{r.errors / r.writes * 100 if r.writes else 0:>7.2f}{len(r.lost):>6}{len(r.invalid):>9}"
+              f"{len(r.clobbered):>9}{r.stale_echo:>7}")
+
+    print()
+    series = {}
+    for r in results:
+        series.setdefault((r.resource.name, r.shared), []).append(r)
+    for (name, shared), levels in series.items():
+        label = f"{name} ({'shared ID' if shared else 'distinct IDs'})"
+        knee = next((cur for prev, cur in zip(levels, levels[1:])
+                     if cur.throughput < prev.throughput * 1.1), None)
+        if knee:
+            print(f"📉 {label}: write throughput stops scaling at {knee.concurrency} concurrent writers "
+                  f"({knee.throughput:.1f} writes/s)")
+        else:
+            print(f"📈 {label}: throughput still rising at {levels[-1].concurrency} writers "
+                  f"({levels[-1].throughput:.1f} writes/s)")
+        for r in levels:
+            for target, problem in (r.lost + r.invalid)[:3]:
+                print(f"   ❌ {r.concurrency} writers, {target}: {problem}")
+            if r.clobbered:
+                fields = sorted({f for _, f in r.clobbered})
+                print(f"   ❌ {r.concurrency} writers: status PATCH changed {', '.join(fields)}")
+            if r.stale_echo:
+                print(f"   ⚠️  {r.concurrency} writers: {r.stale_echo} responses echoed another writer's status")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent write contention test for KYC and alert PATCHes")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--resources", default="kyc,alert", help="Comma-separated: kyc, alert")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Concurrency levels to step through")
+    parser.add_argument("--writes", type=int, default=200, help="PATCHes per level")
+    parser.add_argument("--ids", type=int, default=None,
+                        help="Distinct IDs for the spread-out workload (default: the highest level)")
+    parser.add_argument("--invalid-ratio", type=float, default=0.1,
+                        help="Fraction of PATCHes sending a status the API must reject")
+    add_local_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    levels = [int(level) for level in args.levels.split(",")]
+    id_count = args.ids or max(levels)
+    resources = [RESOURCES[name.strip()] for name in args.resources.split(",")]
+    server = start_local_server(args)
+    base_url = server.base_url if server else args.base_url
+    print(f"🚀 Write contention test against {base_url}")
+
+    results = []
+    with HTTPTransport(pool_size=max(levels)) as transport:
+        tester = ContentionTester(base_url, transport, seed=args.seed)
+        for resource in resources:
+            if resource.name == "kyc":
+                ids = tester.create_merchants(id_count)
+            else:
+                ids = [a["id"] for a in tester._data("GET", "alerts")[:id_count]]
+                if not ids:
+                    print("⚠️  No alerts to contend on; skipping alert contention")
+                    continue
+            original = tester.snapshot(resource, ids)
+            distinct_levels = sorted({min(level, len(ids)) for level in levels})
+            if distinct_levels[-1] < max(levels):
+                print(f"⚠️  {resource.name}: only {len(ids)} IDs, so distinct-ID runs stop at "
+                      f"{len(ids)} writers instead of {max(levels)}")
+            try:
+                for shared in (True, False):
+                    for concurrency in (levels if shared else distinct_levels):
+                        results.append(tester.run_level(resource, ids, concurrency, args.writes,
+                                                        args.invalid_ratio, shared))
+            finally:
+                if resource.name == "alert":
+                    tester.restore(resource, original)
+    if server:
+        server.stop()
+
+    print()
+    report(results)
+    return 0 if results and all(r.correct and not r.errors for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
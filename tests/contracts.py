@@ -0,0 +1,172 @@
+"""
+Declarative response contracts for the SubversePay /api endpoints.
+Each record is checked field by field and every violation is collected; rows breaking
+the same rule are reported together, as data[3, 17].health_score: ...
+"""
+
+# isinstance(value, (int, float)), bool included, as the suite's original checks tested
+NUMERIC = (int, float, bool)
+TEXT = (str,)
+ANY = None  # presence is all that is checked
+SERVICE_STATUSES = ("operational", "degraded", "down")
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
+
+class Field:
+    """A required field, its accepted types (ANY: presence only) and value rules"""
+
+    def __init__(self, name, types, minimum=None, maximum=None, choices=None):
+        self.name = name
+        self.types = tuple(types) if types is not ANY else ANY
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = tuple(choices) if choices is not None else None
+
+
+class Violation:
+    """One rule broken by one or more rows of a batch"""
+
+    def __init__(self, kind, field, rows, message):
+        self.kind = kind  # not_object, missing, type, range, choice
+        self.field = field
+        self.rows = rows
+        self.message = message
+
+    def describe(self, path="data", max_rows=5, single=False):
+        where = path
+        if not single:
+            shown = ", ".join(str(i) for i in self.rows[:max_rows])
+            more = f" (+{len(self.rows) - max_rows} more)" if len(self.rows) > max_rows else ""
+            where = f"{path}[{shown}{more}]"
+        if self.field is not None:
+            where = f"{where}.{self.field}"
+        return f"{where}: {self.message}"
+
+
+class ContractResult:
+    def __init__(self, contract, count, violations, single=False):
+        self.contract = contract
+        self.count = count
+        self.violations = violations
+        self.single = single
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    def errors(self, *kinds):
+        return [v for v in self.violations if v.kind in kinds]
+
+    def summary(self, violations=None, limit=5):
+        violations = self.violations if violations is None else violations
+        lines = [v.describe(single=self.single) for v in violations[:limit]]
+        if len(violations) > limit:
+            lines.append(f"... {len(violations) - limit} more violations")
+        return "; ".join(lines)
+
+
+def _type_names(types):
+    return "|".join(t.__name__ for t in types)
+
+
+def _broken_rule(field, value):
+    """(kind, message) of the first rule `value` breaks, or None"""
+    if value is _MISSING:
+        return "missing", "required field is missing"
+    if field.types is ANY:
+        return None
+    if not isinstance(value, field.types):
+        return "type", f"expected {_type_names(field.types)}, got {type(value).__name__}"
+    if field.minimum is not None and value < field.minimum or field.maximum is not None and value > field.maximum:
+        low = field.minimum if field.minimum is not None else "-inf"
+        high = field.maximum if field.maximum is not None else "inf"
+        return "range", f"value outside [{low}, {high}]"
+    if field.choices is not None and value not in field.choices:
+        return "choice", f"got {value!r}, expected one of {', '.join(field.choices)}"
+    return None
+
+
+class Contract:
+    """A response schema: the fields every record must have.
+
+        MERCHANT_ANALYTICS.validate(body["data"])   # list of records
+        SYSTEM_HEALTH.validate_object(body["data"]) # single record
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = list(fields)
+
+    def validate(self, rows):
+        if not isinstance(rows, list):
+            return ContractResult(self, 0, [Violation("not_object", None, [],
+                                                      f"expected a list, got {type(rows).__name__}")], single=True)
+        not_objects = []
+        broken = {}  # (field, kind, message) -> rows, in the order first seen
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                not_objects.append(index)
+                continue
+            for field in self.fields:
+                rule = _broken_rule(field, row.get(field.name, _MISSING))
+                if rule is not None:
+                    broken.setdefault((field.name, *rule), []).append(index)
+        violations = [Violation("not_object", None, not_objects, "record is not an object")] if not_objects else []
+        # Grouped by field in declaration order, as each field's rules are reported together
+        order = {field.name: i for i, field in enumerate(self.fields)}
+        for (name, kind, message), indices in sorted(broken.items(), key=lambda item: order[item[0][0]]):
+            violations.append(Violation(kind, name, indices, message))
+        return ContractResult(self, len(rows) - len(not_objects), violations)
+
+    def validate_object(self, obj):
+        if not isinstance(obj, dict):
+            return ContractResult(self, 0, [Violation("not_object", None, [0],
+                                                      f"expected an object, got {type(obj).__name__}")], single=True)
+        result = self.validate([obj])
+        result.single = True
+        return result
+
+
+# Only the rules the suite has always enforced: which fields must be present, plus the
+# health score type and the system health ranges and statuses
+
+ANALYTICS_OVERVIEW = Contract("analytics/overview", [
+    Field("total_merchants", ANY),
+    Field("active_merchants", ANY),
+    Field("pending_kyc", ANY),
+    Field("total_subscribers", ANY),
+    Field("total_tpv", ANY),
+    Field("avg_churn_rate", ANY),
+    Field("active_alerts", ANY),
+    Field("monthly_growth", ANY),
+])
+
+MERCHANT_ANALYTICS = Contract("analytics/merchants", [
+    Field("health_score", NUMERIC),
+])
+
+VERTICAL_ANALYTICS = Contract("analytics/verticals", [
+    Field("name", ANY),
+    Field("merchants", ANY),
+    Field("subscribers", ANY),
+    Field("tpv", ANY),
+    Field("avg_churn", ANY),
+    Field("avg_growth", ANY),
+])
+
+SYSTEM_HEALTH = Contract("system-health", [
+    Field("api_uptime", NUMERIC, minimum=0, maximum=100),
+    Field("razorpay_status", TEXT, choices=SERVICE_STATUSES),
+    Field("supabase_status", TEXT, choices=SERVICE_STATUSES),
+    Field("avg_response_time", ANY),
+    Field("total_requests_today", ANY),
+    Field("failed_requests_today", ANY),
+    Field("last_updated", ANY),
+])
@@ -0,0 +1,269 @@
+"""
+Distributed load generation for the SubversePay /api endpoints.
+A coordinator splits the target rate (or virtual users) and endpoint mix across local
+worker processes and/or worker agents on other hosts, starts them at the same instant,
+and merges their latency histograms so the reported percentiles are exact.
+
+    python -m tests.distributed --processes 8 --mode open --rps 2000 --duration 60
+    export LOAD_WORKER_TOKEN=$(openssl rand -hex 16)             # the same on every host
+    python -m tests.distributed --serve 0.0.0.0:7070            # on each load host
+    python -m tests.distributed --remote host1:7070 --remote host2:7070 --rps 5000
+
+Workers speak a small message protocol: job -> {"ready"} -> {"start_at"} -> {"result"}.
+Local workers exchange the messages over a multiprocessing pipe, remote ones as JSON
+lines over TCP.
+
+An agent sends whatever load a job asks for to whatever URL it names, so it binds to
+127.0.0.1 unless given a host, and refuses to start without a shared token (--token or
+LOAD_WORKER_TOKEN); jobs that do not carry the same token are rejected.
+"""
+
+import argparse
+import hmac
+import json
+import math
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import time
+
+from tests.load import LoadResult, add_load_arguments, parse_mix
+from tests.stub_server import start_local_server
+
+# Time allowed between the last worker reporting ready and the common start
+START_DELAY = 0.5
+DEFAULT_AGENT_HOST = "127.0.0.1"
+TOKEN_ENV = "LOAD_WORKER_TOKEN"
+
+
+def run_job(job, send, recv):
+    """Worker side: build the generator, wait for the common start, run, report"""
+    from backend_test import APITester
+    from tests.load import LoadGenerator
+    from tests.transport import HTTPTransport
+
+    concurrency = job["users"] if job["mode"] == "closed" else job["max_in_flight"]
+    with HTTPTransport(pool_size=max(concurrency, 1)) as transport:
+        tester = APITester(base_url=job["base_url"], transport=transport)
+        generator = LoadGenerator(tester, parse_mix(job["mix"]), seed=job["seed"])
+        send({"ready": True})
+        start_at = recv()["start_at"]
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        if job["mode"] == "open":
+            result = generator.run_open(job["rps"], job["duration"], job["warmup"], job["max_in_flight"], job["poisson"])
+        else:
+            result = generator.run_closed(job["users"], job["duration"], job["warmup"], job["think_time"])
+    send({"result": result.to_dict()})
+
+
+def _local_worker(connection):
+    try:
+        run_job(connection.recv(), connection.send, connection.recv)
+    except Exception as e:
+        connection.send({"error": repr(e)})
+    finally:
+        connection.close()
+
+
+class _LocalWorker:
+    def __init__(self, context):
+        self.name = "local"
+        self._connection, child = context.Pipe()
+        self._process = context.Process(target=_local_worker, args=(child,), daemon=True)
+        self._process.start()
+        child.close()
+
+    def send(self, message):
+        self._connection.send(message)
+
+    def recv(self):
+        return self._connection.recv()
+
+    def close(self):
+        self._connection.close()
+        self._process.join(timeout=5)
+
+
+class _JsonLines:
+    """One JSON message per line over a socket"""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._reader = sock.makefile("r", encoding="utf-8")
+
+    def send(self, message):
+        self._sock.sendall((json.dumps(message) + "\n").encode())
+
+    def recv(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Worker connection closed")
+        return json.loads(line)
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+class _RemoteWorker(_JsonLines):
+    def __init__(self, address):
+        host, _, port = address.rpartition(":")
+        super().__init__(socket.create_connection((host, int(port))))
+        self.name = address
+
+
+class _AgentHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        channel = _JsonLines(self.request)
+        try:
+            job = channel.recv()
+            if not hmac.compare_digest(str(job.get("token", "")).encode(), self.server.token.encode()):
+                print(f"⛔ Rejected a job without a valid token from {self.client_address[0]}")
+                channel.send({"error": "invalid token"})
+                return
+            print(f"▶️  Job from {self.client_address[0]}: {job['mode']} loop, {job['duration']:g}s")
+            run_job(job, channel.send, channel.recv)
+        except Exception as e:
+            channel.send({"error": repr(e)})
+
+
+def serve(address, token):
+    """Run a worker agent that accepts jobs carrying `token` from coordinators, one at a time"""
+    host, _, port = address.rpartition(":")
+    host = host or DEFAULT_AGENT_HOST
+    with socketserver.TCPServer((host, int(port)), _AgentHandler) as server:
+        server.token = token
+        print(f"👷 Load worker listening on {host}:{server.server_address[1]}")
+        server.serve_forever()
+
+
+def split(total, parts):
+    """Integer shares of `total` that differ by at most one"""
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def build_jobs(args, base_url, workers):
+    jobs = []
+    users = split(args.users, workers)
+    for index in range(workers):
+        jobs.append({
+            "base_url": base_url,
+            "mode": args.mode,
+            "rps": args.rps / workers,
+            "poisson": args.poisson,
+            "users": users[index],
+            "think_time": args.think_time,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "max_in_flight": math.ceil(args.max_in_flight / workers),
+            "seed": args.seed + index,
+            "token": args.token or "",
+        })
+    return jobs
+
+
+def coordinate(workers, jobs):
+    """Hand out jobs, start every worker at once and merge what they report"""
+    for worker, job in zip(workers, jobs):
+        worker.send(job)
+    for worker in workers:
+        reply = worker.recv()
+        if "error" in reply:
+            raise RuntimeError(f"Worker {worker.name} failed to start: {reply['error']}")
+    start_at = time.time() + START_DELAY
+    for worker in workers:
+        worker.send({"start_at": start_at})
+
+    merged = LoadResult([])
+    per_worker = []
+    for worker in workers:
+        reply = worker.recv()
+        if "error" in reply:
+            raise RuntimeError(f"Worker {worker.name} failed: {reply['error']}")
+        result = LoadResult.from_dict(reply["result"])
+        per_worker.append((worker.name, result))
+        merged.merge(result)
+    return merged, per_worker
+
+
+def report_workers(args, per_worker):
+    """Flag workers that could not keep up: then the client, not the API, set the rate"""
+    print(f"{'Worker':<24}{'Reqs':>8}{'RPS':>9}{'Dropped':>9}")
+    for index, (name, result) in enumerate(per_worker):
+        total = result.total()
+        rate = total.requests / result.duration if result.duration else 0.0
+        print(f"{f'{name} #{index + 1}':<24}{total.requests:>8}{rate:>9.1f}{result.dropped:>9}")
+    if args.mode == "open":
+        target = args.rps / len(per_worker)
+        behind = [name for name, result in per_worker
+                  if result.dropped or result.total().requests < 0.95 * target * result.duration]
+        if behind:
+            print(f"⚠️  {len(behind)} worker(s) fell behind their {target:.1f} req/s share; "
+                  f"add workers or processes so the client is not the bottleneck")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed load test of the SubversePay /api endpoints")
+    add_load_arguments(parser)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Local worker processes (default: one per core, or none with --remote)")
+    parser.add_argument("--remote", action="append", default=[], metavar="HOST:PORT",
+                        help="Worker agent to include (repeatable)")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help=f"Run as a worker agent instead of a coordinator (host defaults to {DEFAULT_AGENT_HOST})")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"Shared secret between coordinator and agents (default: ${TOKEN_ENV})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        if not args.token:
+            print(f"❌ A worker agent needs a shared token: --token or {TOKEN_ENV}")
+            return 2
+        serve(args.serve, args.token)
+        return 0
+
+    processes = args.processes if args.processes is not None else (0 if args.remote else multiprocessing.cpu_count())
+    if processes + len(args.remote) < 1:
+        print("❌ No workers: use --processes and/or --remote")
+        return 2
+    if args.remote and args.local:
+        print("❌ --local serves on this host's loopback, which remote workers cannot reach; use --base-url")
+        return 2
+    if args.remote and not args.token:
+        print(f"❌ Remote workers need the agents' shared token: --token or {TOKEN_ENV}")
+        return 2
+    server = start_local_server(args)
+    base_url = server.base_url if server else args.base_url
+
+    print(f"🚀 Distributed load test ({args.mode} loop) against {base_url}")
+    print(f"👷 {processes} local process(es), {len(args.remote)} remote worker(s)")
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    try:
+        workers.extend(_LocalWorker(context) for _ in range(processes))
+        workers.extend(_RemoteWorker(address) for address in args.remote)
+        merged, per_worker = coordinate(workers, build_jobs(args, base_url, len(workers)))
+    finally:
+        for worker in workers:
+            worker.close()
+        if server:
+            server.stop()
+
+    print()
+    merged.report()
+    print()
+    report_workers(args, per_worker)
+    total = merged.total()
+    return 0 if total.requests and not total.errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+Shared fixture cache for the SubversePay API testing suite.
+CachingTransport wraps any transport and memoizes successful GETs in a bounded LRU,
+so a read repeated within a run is served without a round trip. Every
+POST/PATCH/PUT/DELETE invalidates the cached reads it can change:
+
+    merchants/<id>/kyc   ->  merchants lists, merchants/<id>, analytics/*
+    alerts/<id>          ->  alerts lists, alerts/<id>, analytics/overview
+
+    python backend_test.py --cache --cache-entries 256 --cache-mb 64
+
+The suite itself gains nothing from it today: checks hand IDs and context to each
+other through the check context, so one backend_test pass reads each URL once, and the
+--cross-check reads come after the writes that invalidate them (0 hits either way).
+The cache only saves requests for code that repeats reads on one APITester with no
+write in between. Soak does not offer it, because its repeated reads are the latency
+it is there to measure.
+
+Cache hits are flagged on the exchange (`cached`), and the timing sinks skip them, so
+they never pass for API latency.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from tests.cassette import request_key
+from tests.transport import RequestTiming, buffered_response
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Headers describing the wire encoding, which no longer applies to the decoded body we keep
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+# Collection written -> other path prefixes whose responses are derived from it
+DEPENDENTS = {
+    "merchants": ("analytics",),
+    "alerts": ("analytics/overview",),
+    "settlements": ("analytics",),
+}
+
+
+class CachedTiming(RequestTiming):
+    """Timing of a cache hit: no network phases, the body size of the cached response"""
+
+    def __init__(self, started, response_bytes):
+        super().__init__(started, 0.0, started, started, 0, response_bytes)
+
+    def finish_stream(self, finished, response_bytes):
+        # Nothing was downloaded; reading the cached body is not a network phase
+        pass
+
+
+def _under(path, prefix):
+    return path == prefix or path.startswith(prefix + "/")
+
+
+class _Entry:
+    __slots__ = ("status", "headers", "body", "path")
+
+    def __init__(self, status, headers, body, path):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.path = path
+
+
+class FixtureCache:
+    """LRU of GET responses bounded by entry count and total body bytes.
+
+    Responses larger than a quarter of `max_bytes` are never cached, so one huge list
+    cannot flush everything else. Keys carry the API-relative path, which is what
+    write invalidation matches on.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a read that started before it must not be stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry, generation):
+        size = len(entry.body)
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if generation != self.generation:
+                return False
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.evicted += 1
+        return True
+
+    def invalidate(self, path):
+        """Drop every cached read a write to `path` (e.g. 'merchants/42/kyc') can change"""
+        parts = path.strip("/").split("/")
+        collection = parts[0]
+        if collection in DEPENDENTS:
+            # The collection's lists, the written item and everything under it, and derived views
+            item = f"{collection}/{parts[1]}" if len(parts) > 1 else None
+            prefixes = (item,) + DEPENDENTS[collection] if item else DEPENDENTS[collection]
+
+            def is_stale(entry_path):
+                return entry_path == collection or any(_under(entry_path, prefix) for prefix in prefixes)
+        else:
+            # Unknown resource: nothing cached can be trusted
+            def is_stale(entry_path):
+                return True
+
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, entry in self._entries.items() if is_stale(entry.path)]
+            for key in stale:
+                self._bytes -= len(self._entries.pop(key).body)
+            self.invalidated += len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidated": self.invalidated,
+                "evicted": self.evicted,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+class CachingTransport:
+    """Transport wrapper that serves repeated GETs from a FixtureCache.
+
+    Only 2xx GETs are stored. A streamed GET is read in full before it is cached, and
+    only when its Content-Length says it fits; larger or chunked streams pass through
+    untouched so their constant-memory validation is kept.
+    """
+
+    def __init__(self, transport, base_url, cache=None):
+        self.transport = transport
+        self.cache = cache or FixtureCache()
+        self._base_path = urlsplit(base_url).path.rstrip("/") + "/"
+
+    def _path(self, url):
+        path = urlsplit(url).path
+        if path.startswith(self._base_path):
+            path = path[len(self._base_path):]
+        return path.strip("/")
+
+    def request(self, method, url, stream=False, **kwargs):
+        if method.upper() in _WRITE_METHODS:
+            try:
+                return self.transport.request(method, url, stream=stream, **kwargs)
+            finally:
+                # Also after a failure: the write may have been applied before the error
+                self.cache.invalidate(self._path(url))
+        if method.upper() != "GET":
+            return self.transport.request(method, url, stream=stream, **kwargs)
+
+        key = request_key(method, url, **kwargs)
+        entry = self.cache.get(key)
+        if entry is not None:
+            response = buffered_response(entry.status, entry.headers, entry.body, url,
+                                         CachedTiming(time.perf_counter(), len(entry.body)))
+            response.from_cache = True
+            return response
+
+        generation = self.cache.generation
+        response = self.transport.request(method, url, stream=stream, **kwargs)
+        if not 200 <= response.status_code < 300:
+            return response
+        if stream:
+            length = response.headers.get("Content-Length")
+            if length is None or int(length) > self.cache.max_entry_bytes:
+                return response
+            body = b"".join(self.transport.iter_content(response))
+            response.timing.finish_stream(time.perf_counter(), len(body))
+            response.close()
+        else:
+            body = response.content
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        self.cache.put(key, _Entry(response.status_code, headers, body, self._path(url)), generation)
+        if stream:
+            # The stream was consumed to fill the cache; hand back the buffered body
+            buffered = buffered_response(response.status_code, headers, body, url, response.timing)
+            buffered.buffered = True
+            return buffered
+        return response
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        if getattr(response, "from_cache", False) or getattr(response, "buffered", False):
+            return response.iter_content(chunk_size)
+        return self.transport.iter_content(response, chunk_size)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def stats(self):
+        stats = dict(self.transport.stats())
+        stats["cache"] = self.cache.stats()
+        return stats
+
+    def close(self):
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_cache_arguments(parser):
+    parser.add_argument("--cache", action="store_true",
+                        help="Serve repeated GETs from a fixture cache that writes invalidate")
+    parser.add_argument("--cache-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                        help="Maximum responses held by --cache")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="Maximum body megabytes held by --cache")
+
+
+def wrap_transport(args, transport, base_url):
+    """`transport` wrapped in a CachingTransport when --cache is set"""
+    if not getattr(args, "cache", False):
+        return transport
+    cache = FixtureCache(args.cache_entries, int(args.cache_mb * 1024 * 1024))
+    return CachingTransport(transport, base_url, cache)
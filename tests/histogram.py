@@ -0,0 +1,144 @@
+"""
+HDR-style latency histogram for the SubversePay API load tools.
+Log-linear buckets give a fixed relative precision over the whole range, so percentiles
+stay accurate from sub-millisecond to minute-long latencies and histograms merge exactly.
+"""
+
+import math
+
+DEFAULT_HIGHEST = 3_600_000_000  # one hour in microseconds
+DEFAULT_SIGNIFICANT_FIGURES = 3
+
+
+class LatencyHistogram:
+    """Counts integer values (microseconds) into log-linear buckets.
+
+    With significant_figures=3 every recorded value is reproduced to within 0.1%.
+    Values above `highest` are clamped into the top bucket.
+    """
+
+    def __init__(self, highest=DEFAULT_HIGHEST, significant_figures=DEFAULT_SIGNIFICANT_FIGURES):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.highest = highest
+        self.significant_figures = significant_figures
+
+        sub_bucket_count = 1 << math.ceil(math.log2(2 * 10 ** significant_figures))
+        self._sub_bucket_magnitude = sub_bucket_count.bit_length() - 1
+        self._sub_bucket_half_count = sub_bucket_count // 2
+        self._sub_bucket_mask = sub_bucket_count - 1
+
+        bucket_count = 1
+        while (sub_bucket_count << (bucket_count - 1)) <= highest:
+            bucket_count += 1
+        self.counts = [0] * ((bucket_count + 1) * self._sub_bucket_half_count)
+
+        self.total_count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        bucket = (value | self._sub_bucket_mask).bit_length() - self._sub_bucket_magnitude
+        sub_bucket = value >> bucket
+        return ((bucket + 1) << (self._sub_bucket_magnitude - 1)) + sub_bucket - self._sub_bucket_half_count
+
+    def _value_range(self, index):
+        """Lowest value and width of the bucket at a counts index"""
+        bucket = (index >> (self._sub_bucket_magnitude - 1)) - 1
+        sub_bucket = (index & (self._sub_bucket_half_count - 1)) + self._sub_bucket_half_count
+        if bucket < 0:
+            bucket = 0
+            sub_bucket -= self._sub_bucket_half_count
+        return sub_bucket << bucket, 1 << bucket
+
+    def record(self, value, count=1):
+        value = min(max(int(value), 0), self.highest)
+        self.counts[self._index(value)] += count
+        self.total_count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def record_seconds(self, seconds):
+        self.record(round(seconds * 1_000_000))
+
+    def value_at_percentile(self, percentile):
+        """Highest value equivalent to the given percentile (0-100)"""
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total_count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                seen += count
+                if seen >= target:
+                    low, width = self._value_range(index)
+                    return min(low + width - 1, self.max)
+        return self.max
+
+    def percentiles(self, points=(50, 90, 99, 99.9)):
+        """Values for several percentiles in one pass"""
+        results = {}
+        if not self.total_count:
+            return {p: 0 for p in points}
+        targets = sorted((max(1, math.ceil(p / 100 * self.total_count)), p) for p in points)
+        seen = 0
+        pending = iter(targets)
+        target, point = next(pending)
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while seen >= target:
+                low, width = self._value_range(index)
+                results[point] = min(low + width - 1, self.max)
+                try:
+                    target, point = next(pending)
+                except StopIteration:
+                    return results
+        return results
+
+    @property
+    def mean(self):
+        return self.total / self.total_count if self.total_count else 0.0
+
+    def merge(self, other):
+        """Add another histogram's counts; both must share the same layout"""
+        if len(other.counts) != len(self.counts) or other.significant_figures != self.significant_figures:
+            raise ValueError("Cannot merge histograms with different layouts")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total_count += other.total_count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def to_dict(self):
+        """Sparse, JSON-serialisable form"""
+        return {
+            "highest": self.highest,
+            "significant_figures": self.significant_figures,
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+            "total_count": self.total_count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["highest"], data["significant_figures"])
+        for index, count in data["counts"].items():
+            histogram.counts[int(index)] = count
+        histogram.total_count = data["total_count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
@@ -0,0 +1,324 @@
+"""
+Load-generation mode for the SubversePay /api endpoints.
+Drives the endpoint catalogue APITester exercises at a fixed arrival rate (open loop) or
+with N virtual users (closed loop) and reports latency percentiles per endpoint.
+
+    python -m tests.load --mode open --rps 50 --duration 60 --warmup 10
+    python -m tests.load --mode closed --users 20 --mix merchants=5,alerts=2
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_test import BASE_URL, APITester
+from tests.baseline import add_baseline_arguments, apply_baseline, run_from_load
+from tests.calibration import (EchoTarget, add_calibration_arguments, record_routes, route_overhead,
+                               temporary_cassette)
+from tests.histogram import LatencyHistogram
+from tests.profiling import ProfileSession, add_profile_arguments
+from tests.stub_server import add_local_arguments, start_local_server
+from tests.transport import HTTPTransport
+
+
+class Endpoint:
+    def __init__(self, name, path, params=None, weight=1.0):
+        self.name = name
+        self.path = path
+        self.params = params
+        self.weight = weight
+
+
+# Read-only requests made by the APITester suites
+ENDPOINTS = [
+    Endpoint("merchants", "merchants"),
+    Endpoint("merchants?kyc_status", "merchants", {"kyc_status": "approved"}),
+    Endpoint("merchants?vertical", "merchants", {"vertical": "ISP"}),
+    Endpoint("alerts", "alerts"),
+    Endpoint("alerts?status", "alerts", {"status": "active"}),
+    Endpoint("alerts?severity", "alerts", {"severity": "high"}),
+    Endpoint("settlements", "settlements"),
+    Endpoint("settlements?status", "settlements", {"status": "completed"}),
+    Endpoint("analytics/overview", "analytics/overview"),
+    Endpoint("analytics/merchants", "analytics/merchants"),
+    Endpoint("analytics/verticals", "analytics/verticals"),
+    Endpoint("system-health", "system-health"),
+]
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_mix(spec, endpoints=ENDPOINTS):
+    """Apply a 'name=weight,...' traffic mix; endpoints not named keep their weight"""
+    by_name = {e.name: e for e in endpoints}
+    selected = [Endpoint(e.name, e.path, e.params, e.weight) for e in endpoints]
+    if not spec:
+        return selected
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in by_name:
+            raise ValueError(f"Unknown endpoint in mix: {name.strip()} (known: {', '.join(by_name)})")
+        weights[name.strip()] = float(weight or 1)
+    for endpoint in selected:
+        endpoint.weight = weights.get(endpoint.name, 0.0)
+    return [e for e in selected if e.weight > 0]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.requests += other.requests
+        self.errors += other.errors
+        return self
+
+    def to_dict(self):
+        return {"histogram": self.histogram.to_dict(), "requests": self.requests, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.requests = data["requests"]
+        stats.errors = data["errors"]
+        return stats
+
+
+class LoadResult:
+    """Per-endpoint histograms and counters for the measured (post-warmup) window"""
+
+    def __init__(self, endpoints):
+        self.stats = {e.name: EndpointStats() for e in endpoints}
+        self.duration = 0.0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, ok):
+        with self._lock:
+            stats = self.stats[endpoint.name]
+            stats.requests += 1
+            stats.histogram.record_seconds(latency)
+            if not ok:
+                stats.errors += 1
+
+    def total(self):
+        combined = EndpointStats()
+        for stats in self.stats.values():
+            combined.merge(stats)
+        return combined
+
+    def merge(self, other):
+        """Fold in another run over the same window (e.g. from another worker process)"""
+        for name, stats in other.stats.items():
+            self.stats.setdefault(name, EndpointStats()).merge(stats)
+        self.dropped += other.dropped
+        self.duration = max(self.duration, other.duration)
+        return self
+
+    def to_dict(self):
+        return {"stats": {name: stats.to_dict() for name, stats in self.stats.items()},
+                "duration": self.duration, "dropped": self.dropped}
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls([])
+        result.stats = {name: EndpointStats.from_dict(stats) for name, stats in data["stats"].items()}
+        result.duration = data["duration"]
+        result.dropped = data["dropped"]
+        return result
+
+    def report(self, overhead=None):
+        """Print the table; `overhead` ({endpoint: seconds}) adds each route's client-side share"""
+        header = f"{'Endpoint':<24}{'Reqs':>8}{'RPS':>9}{'Err%':>7}" + "".join(f"{'p' + format(p, 'g'):>10}" for p in PERCENTILES) + f"{'Max':>10}"
+        if overhead:
+            header += f"{'Client':>10}"
+        print(header)
+        print("-" * len(header))
+        rows = list(self.stats.items()) + [("TOTAL", self.total())]
+        for name, stats in rows:
+            if not stats.requests:
+                continue
+            values = stats.histogram.percentiles(PERCENTILES)
+            line = (f"{name:<24}{stats.requests:>8}{stats.requests / self.duration:>9.1f}"
+                    f"{stats.errors / stats.requests * 100:>7.2f}"
+                    + "".join(f"{values[p] / 1000:>8.1f}ms" for p in PERCENTILES)
+                    + f"{stats.histogram.max / 1000:>8.1f}ms")
+            if overhead:
+                line += f"{overhead[name] * 1000:>8.2f}ms" if name in overhead else f"{'-':>10}"
+            print(line)
+        if overhead:
+            print("Client: median time the harness itself adds per request (zero-latency echo); "
+                  "subtract it for the server's share")
+        if self.dropped:
+            print(f"⚠️  {self.dropped} arrivals dropped: client concurrency limit reached")
+
+
+class LoadGenerator:
+    """Runs a traffic mix against one APITester.
+
+    Latency for the open loop is measured from each request's scheduled arrival time, so
+    queueing behind a slow server is included rather than silently omitted.
+    """
+
+    def __init__(self, tester, endpoints=ENDPOINTS, seed=0):
+        self.tester = tester
+        self.endpoints = list(endpoints)
+        self._weights = [e.weight for e in self.endpoints]
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _pick(self):
+        with self._random_lock:
+            return self._random.choices(self.endpoints, self._weights)[0]
+
+    def _call(self, endpoint):
+        success, _ = self.tester.test_get_request(endpoint.path, params=endpoint.params)
+        return success
+
+    def run_open(self, rps, duration, warmup=0.0, max_in_flight=256, poisson=False):
+        """Fixed arrival rate for warmup + duration seconds"""
+        result = LoadResult(self.endpoints)
+        in_flight = threading.Semaphore(max_in_flight)
+        start = time.perf_counter()
+        measure_from = start + warmup
+        end = measure_from + duration
+
+        def fire(endpoint, scheduled):
+            try:
+                ok = self._call(endpoint)
+                finished = time.perf_counter()
+                if scheduled >= measure_from:
+                    result.record(endpoint, finished - scheduled, ok)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            scheduled = start
+            while scheduled < end:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                endpoint = self._pick()
+                if in_flight.acquire(blocking=False):
+                    pool.submit(fire, endpoint, scheduled)
+                elif scheduled >= measure_from:
+                    result.dropped += 1
+                with self._random_lock:
+                    gap = self._random.expovariate(rps) if poisson else 1.0 / rps
+                scheduled += gap
+
+        result.duration = duration
+        return result
+
+    def run_closed(self, users, duration, warmup=0.0, think_time=0.0):
+        """N virtual users, each sending its next request when the previous one returns"""
+        result = LoadResult(self.endpoints)
+        start = time.perf_counter()
+        measure_from = start + warmup
+        end = measure_from + duration
+
+        def user():
+            while True:
+                sent = time.perf_counter()
+                if sent >= end:
+                    return
+                endpoint = self._pick()
+                ok = self._call(endpoint)
+                if sent >= measure_from:
+                    result.record(endpoint, time.perf_counter() - sent, ok)
+                if think_time:
+                    time.sleep(think_time)
+
+        threads = [threading.Thread(target=user, daemon=True) for _ in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        result.duration = duration
+        return result
+
+
+def add_load_arguments(parser):
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--mode", choices=["open", "closed"], default="open",
+                        help="open: fixed arrival rate; closed: fixed number of virtual users")
+    parser.add_argument("--rps", type=float, default=20.0, help="Arrival rate for the open loop")
+    parser.add_argument("--poisson", action="store_true", help="Poisson rather than evenly spaced arrivals")
+    parser.add_argument("--users", type=int, default=10, help="Virtual users for the closed loop")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between a user's requests (s)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured duration (s)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured warmup before the run (s)")
+    parser.add_argument("--mix", default="", help="Traffic mix, e.g. merchants=5,alerts?status=2")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop client concurrency limit")
+    add_local_arguments(parser)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the SubversePay /api endpoints")
+    add_load_arguments(parser)
+    add_baseline_arguments(parser)
+    add_calibration_arguments(parser)
+    add_profile_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    endpoints = parse_mix(args.mix)
+    concurrency = args.users if args.mode == "closed" else args.max_in_flight
+    server = start_local_server(args)
+    base_url = server.base_url if server else args.base_url
+
+    print(f"🚀 Load test ({args.mode} loop) against {base_url}")
+    if args.mode == "open":
+        print(f"📈 {args.rps:g} req/s for {args.duration:g}s after {args.warmup:g}s warmup")
+    else:
+        print(f"👥 {args.users} users for {args.duration:g}s after {args.warmup:g}s warmup")
+
+    profile = ProfileSession(args)
+    with HTTPTransport(pool_size=concurrency) as transport, profile:
+        tester = APITester(base_url=base_url, transport=transport)
+        generator = LoadGenerator(tester, endpoints, seed=args.seed)
+        if args.mode == "open":
+            result = generator.run_open(args.rps, args.duration, args.warmup, args.max_in_flight, args.poisson)
+        else:
+            result = generator.run_closed(args.users, args.duration, args.warmup, args.think_time)
+    overhead = None
+    if args.calibrate:
+        # One GET per route feeds the echo; the calls measured against it never reach the target
+        cassette = temporary_cassette()
+        try:
+            record_routes(base_url, endpoints, cassette)
+            with EchoTarget(cassette, base_url) as echo:
+                overhead = route_overhead(echo.base_url, endpoints)
+        finally:
+            os.unlink(cassette)
+        total = sum(overhead[e.name] * result.stats[e.name].requests for e in endpoints)
+        requests = result.total().requests
+        if requests:
+            overhead["TOTAL"] = total / requests
+    if server:
+        server.stop()
+
+    print()
+    result.report(overhead)
+    profile.report()
+    total = result.total()
+    success = bool(total.requests) and not total.errors
+    if args.save_baseline or args.compare_baseline:
+        success = apply_baseline(args, run_from_load(result), success) and success
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
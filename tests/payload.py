@@ -0,0 +1,308 @@
+"""
+Payload size and compression benchmark for the SubversePay /api endpoints.
+Every read-only route of the load-test catalogue is fetched once per Accept-Encoding
+(identity, gzip, br) and the bytes actually sent are counted before decoding. Per
+route it reports raw and on-the-wire sizes, compression ratio, the CPU time to decode
+and to JSON-parse the body, bytes per record for list endpoints, and the bandwidth the
+route would take at a given request rate.
+
+    python -m tests.payload --rps 50
+    python -m tests.payload --local --sizes 100,1000,10000 --json payload.json
+
+When the server does not compress a response, the sizes gzip (level 6) and brotli
+(quality 5, a common on-the-fly setting) would reach are computed locally and marked
+with '*'. Brotli sizes and decode times need the brotli package (pip install brotli);
+without it those columns are left empty.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+import zlib
+
+from backend_test import BASE_URL
+from tests.load import ENDPOINTS
+from tests.stub_server import add_local_arguments, start_local_server
+from tests.transport import HTTPTransport
+
+ENCODINGS = ("identity", "gzip", "br")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+DEFAULT_REPEAT = 5
+# Beyond these a response is flagged: a mobile admin on a slow link feels it
+MAX_WIRE_BYTES = 256 * 1024
+MAX_RECORD_BYTES = 1024
+MIN_WORTHWHILE_RATIO = 2.0
+
+
+def _brotli():
+    """The brotli module, or None when it is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _decoder(encoding):
+    if encoding == "gzip":
+        # Raw zlib with gzip framing; also accepts concatenated members like gzip.decompress
+        return lambda body: zlib.decompressobj(zlib.MAX_WBITS | 16).decompress(body)
+    if encoding == "br":
+        brotli = _brotli()
+        return brotli.decompress if brotli else None
+    if encoding == "deflate":
+        return zlib.decompress
+    return None
+
+
+def _compress(encoding, body):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    brotli = _brotli()
+    return brotli.compress(body, quality=BROTLI_QUALITY) if brotli else None
+
+
+def cpu_time(func, arg, repeat=DEFAULT_REPEAT):
+    """Best-of-`repeat` thread CPU seconds for func(arg)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.thread_time()
+        func(arg)
+        best = min(best, time.thread_time() - started)
+    return best
+
+
+class EncodingResult:
+    """What one Accept-Encoding produced for a route"""
+
+    def __init__(self, requested, served, wire_bytes, decode_seconds, estimated=False):
+        self.requested = requested
+        self.served = served
+        self.wire_bytes = wire_bytes
+        self.decode_seconds = decode_seconds
+        self.estimated = estimated  # server sent identity; size is what compression would give
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class RoutePayload:
+    def __init__(self, name, dataset_size):
+        self.name = name
+        self.dataset_size = dataset_size
+        self.raw_bytes = 0
+        self.records = None
+        self.parse_seconds = 0.0
+        self.encodings = {}
+        self.error = None
+
+    @property
+    def bytes_per_record(self):
+        return self.raw_bytes / self.records if self.records else None
+
+    def best(self):
+        """Smallest on-the-wire result the server actually served"""
+        served = [e for e in self.encodings.values() if e.wire_bytes is not None and not e.estimated]
+        return min(served, key=lambda e: e.wire_bytes, default=None)
+
+    def ratio(self, encoding):
+        result = self.encodings.get(encoding)
+        if result is None or not result.wire_bytes:
+            return None
+        return self.raw_bytes / result.wire_bytes
+
+    def bandwidth(self, rps):
+        """Projected bytes per second at `rps` with the best served encoding"""
+        best = self.best()
+        return best.wire_bytes * rps if best else None
+
+    def advice(self):
+        best = self.best()
+        hints = []
+        if best and best.wire_bytes > MAX_WIRE_BYTES:
+            hints.append(f"{best.wire_bytes / 1024:,.0f}KB on the wire: paginate" if self.records
+                         else f"{best.wire_bytes / 1024:,.0f}KB on the wire")
+        if self.bytes_per_record and self.bytes_per_record > MAX_RECORD_BYTES:
+            hints.append(f"{self.bytes_per_record:,.0f}B/record: project fields")
+        potential = max((self.ratio(e) or 0 for e, r in self.encodings.items() if r.estimated), default=0)
+        if best and best.served == "identity" and potential >= MIN_WORTHWHILE_RATIO:
+            hints.append(f"served uncompressed, {potential:.1f}x smaller compressed: enable compression")
+        return hints
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "dataset_size": self.dataset_size,
+            "raw_bytes": self.raw_bytes,
+            "records": self.records,
+            "bytes_per_record": self.bytes_per_record,
+            "parse_seconds": self.parse_seconds,
+            "encodings": {name: result.to_dict() for name, result in self.encodings.items()},
+            "error": self.error,
+        }
+
+
+class PayloadBenchmark:
+    def __init__(self, base_url, transport, repeat=DEFAULT_REPEAT):
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport
+        self.repeat = repeat
+
+    def _fetch(self, endpoint, encoding):
+        """(served Content-Encoding, body bytes as sent)"""
+        response = self.transport.request("GET", f"{self.base_url}/{endpoint.path}", params=endpoint.params,
+                                          headers={"Accept-Encoding": encoding}, stream=True)
+        try:
+            response.raise_for_status()
+            body = b"".join(self.transport.iter_raw(response))
+        finally:
+            response.close()
+        return response.headers.get("Content-Encoding", "identity").lower(), body
+
+    def measure(self, endpoint, dataset_size=None):
+        route = RoutePayload(endpoint.name, dataset_size)
+        _, raw = self._fetch(endpoint, "identity")
+        route.raw_bytes = len(raw)
+        route.parse_seconds = cpu_time(json.loads, raw, self.repeat)
+        data = json.loads(raw).get("data")
+        if isinstance(data, list):
+            route.records = len(data)
+        route.encodings["identity"] = EncodingResult("identity", "identity", len(raw), 0.0)
+
+        for encoding in ENCODINGS[1:]:
+            served, body = self._fetch(endpoint, encoding)
+            if served != "identity":
+                decode = _decoder(served)
+                seconds = cpu_time(decode, body, self.repeat) if decode else None
+                route.encodings[encoding] = EncodingResult(encoding, served, len(body), seconds)
+                continue
+            compressed = _compress(encoding, raw)
+            if compressed is None:
+                route.encodings[encoding] = EncodingResult(encoding, served, None, None, estimated=True)
+            else:
+                seconds = cpu_time(_decoder(encoding), compressed, self.repeat)
+                route.encodings[encoding] = EncodingResult(encoding, served, len(compressed), seconds,
+                                                           estimated=True)
+        return route
+
+    def run(self, endpoints=ENDPOINTS, dataset_size=None):
+        routes = []
+        for endpoint in endpoints:
+            try:
+                routes.append(self.measure(endpoint, dataset_size))
+            except Exception as e:
+                route = RoutePayload(endpoint.name, dataset_size)
+                route.error = repr(e)
+                routes.append(route)
+        return routes
+
+
+def _size(value):
+    if value is None:
+        return "-"
+    if value >= 1024 * 1024:
+        return f"{value / (1024 * 1024):.1f}MB"
+    if value >= 1024:
+        return f"{value / 1024:.1f}KB"
+    return f"{value:.0f}B"
+
+
+def _encoded(route, encoding):
+    result = route.encodings.get(encoding)
+    if result is None or result.wire_bytes is None:
+        return "-"
+    return f"{_size(result.wire_bytes)}{'*' if result.estimated else ''} ({route.ratio(encoding):.1f}x)"
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def report(routes, rps):
+    header = (f"{'Endpoint':<24}{'Records':>9}{'Raw':>10}{'B/rec':>8}{'gzip':>18}{'br':>18}"
+              f"{'gz ms':>8}{'br ms':>8}{'parse ms':>10}{f'Mbit/s@{rps:g}':>14}")
+    print(header)
+    print("-" * len(header))
+    for route in routes:
+        if route.error:
+            print(f"{route.name:<24}  ❌ {route.error}")
+            continue
+        per_record = f"{route.bytes_per_record:.0f}" if route.bytes_per_record else "-"
+        bandwidth = route.bandwidth(rps)
+        gz, br = route.encodings.get("gzip"), route.encodings.get("br")
+        print(f"{route.name:<24}{route.records if route.records is not None else '-':>9}"
+              f"{_size(route.raw_bytes):>10}{per_record:>8}{_encoded(route, 'gzip'):>18}{_encoded(route, 'br'):>18}"
+              f"{_ms(gz.decode_seconds if gz else None):>8}{_ms(br.decode_seconds if br else None):>8}"
+              f"{_ms(route.parse_seconds):>10}{bandwidth * 8 / 1e6 if bandwidth else 0:>14.2f}")
+    if any(result.estimated and result.wire_bytes is not None for r in routes for result in r.encodings.values()):
+        print("* server sent identity; size and decode time of compressing it locally")
+    if _brotli() is None:
+        print("br columns need the brotli package to decode or estimate: pip install brotli")
+    for route in routes:
+        for hint in route.advice():
+            print(f"⚠️  {route.name}: {hint}")
+
+
+def report_scaling(runs):
+    """Bytes per dataset record for list routes, fitted across the dataset sizes"""
+    by_name = {}
+    for size, routes in runs:
+        for route in routes:
+            if route.records is not None and not route.error:
+                by_name.setdefault(route.name, []).append((size, route.raw_bytes, route.best()))
+    if not by_name:
+        return
+    print(f"{'Endpoint':<24}{'Raw B per dataset row':>24}{'Wire B per dataset row':>24}")
+    for name, points in by_name.items():
+        if len(points) < 2:
+            continue
+        (x0, raw0, best0), (x1, raw1, best1) = points[0], points[-1]
+        wire0 = best0.wire_bytes if best0 else raw0
+        wire1 = best1.wire_bytes if best1 else raw1
+        print(f"{name:<24}{(raw1 - raw0) / (x1 - x0):>24,.1f}{(wire1 - wire0) / (x1 - x0):>24,.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Response size and compression benchmark for /api endpoints")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--rps", type=float, default=10.0, help="Request rate for the bandwidth projection")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Best-of repetitions for CPU timings")
+    parser.add_argument("--sizes", help="With --local, comma-separated dataset sizes to benchmark in turn")
+    parser.add_argument("--json", metavar="PATH", help="Write every measurement as JSON")
+    add_local_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = sorted({int(size) for size in args.sizes.split(",")}) if args.local and args.sizes else [args.dataset_size]
+    runs = []
+    with HTTPTransport() as transport:
+        for size in sizes:
+            server = start_local_server(argparse.Namespace(**{**vars(args), "dataset_size": size}))
+            base_url = server.base_url if server else args.base_url
+            try:
+                routes = PayloadBenchmark(base_url, transport, args.repeat).run(
+                    dataset_size=size if server else None)
+            finally:
+                if server:
+                    server.stop()
+            runs.append((size if server else None, routes))
+            print()
+            report(routes, args.rps)
+            print()
+    if len(runs) > 1:
+        report_scaling(runs)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"rps": args.rps, "runs": [[route.to_dict() for route in routes] for _, routes in runs]},
+                      f, indent=2)
+    return 0 if all(not route.error for _, routes in runs for route in routes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
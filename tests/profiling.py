@@ -0,0 +1,208 @@
+"""
+Self-profiling hooks for the SubversePay API harness.
+Attributes the harness's own CPU time to functions across every thread it runs,
+either with cProfile (deterministic, higher overhead) or with a sampling profiler
+that weights each stack sample by the CPU its thread used since the last sample.
+
+    python backend_test.py --local --profile sample --profile-out harness.folded
+    python -m tests.load --local --profile cprofile --profile-out load.pstats
+
+Threads of the in-process --local server are left out, so the figures are the
+client's. Sampled stacks are written in the collapsed 'a;b;c weight' format that
+flame graph tools read; cProfile output is a pstats dump.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.001
+# Threads serving the --local stand-in server rather than running the harness
+_SERVER_THREADS = ("process_request_thread", "serve_forever")
+
+
+def _is_server_thread(name):
+    return any(marker in name for marker in _SERVER_THREADS)
+
+
+def _thread_cpu(ident):
+    """CPU seconds used by thread `ident`, or None where the platform cannot tell"""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack each `interval` seconds from a background thread.
+
+    On Linux each sample is weighted by the thread's CPU time since its previous
+    sample, so threads blocked on the network or a lock contribute nothing; elsewhere
+    each sample counts as `interval` of wall time.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.self_time = Counter()
+        self.total_time = Counter()
+        self.stacks = Counter()
+        self.samples = 0
+        self._last_cpu = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            # Thread idents are reused; forget the CPU clocks of threads that have ended
+            for ident in self._last_cpu.keys() - names.keys():
+                del self._last_cpu[ident]
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_server_thread(names.get(ident, "")):
+                    continue
+                weight = self._weight(ident)
+                if weight:
+                    self._record(frame, weight)
+
+    def _weight(self, ident):
+        cpu = _thread_cpu(ident)
+        if cpu is None:
+            return self.interval
+        previous = self._last_cpu.get(ident)
+        self._last_cpu[ident] = cpu
+        return max(cpu - previous, 0.0) if previous is not None else 0.0
+
+    def _record(self, frame, weight):
+        stack = []
+        while frame is not None:
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        self.samples += 1
+        self.self_time[stack[0]] += weight
+        for label in set(stack):
+            self.total_time[label] += weight
+        self.stacks[";".join(reversed(stack))] += weight
+
+    def report(self, limit=25, out=print):
+        total = sum(self.self_time.values())
+        out(f"🔬 Sampled {self.samples} stacks, {total * 1000:.0f}ms of harness CPU")
+        out(f"{'Self ms':>9}{'Self%':>7}{'Total ms':>10}  Function")
+        for label, seconds in self.self_time.most_common(limit):
+            out(f"{seconds * 1000:>9.1f}{seconds / total * 100 if total else 0:>7.1f}"
+                f"{self.total_time[label] * 1000:>10.1f}  {label}")
+
+    def dump(self, path):
+        """Collapsed stacks, weights in microseconds"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, seconds in self.stacks.most_common():
+                f.write(f"{stack} {max(int(seconds * 1e6), 1)}\n")
+
+
+class CProfileProfiler:
+    """cProfile on the calling thread and on every thread started while it runs"""
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+
+    def _thread_hook(self, frame, event, arg):
+        # First profile event of a new thread: hand the thread over to its own cProfile
+        sys.setprofile(None)
+        if _is_server_thread(threading.current_thread().name):
+            return
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self._thread_hook)
+        self._main.enable()
+        return self
+
+    def stop(self):
+        self._main.disable()
+        threading.setprofile(None)
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        stream = io.StringIO()
+        stats = pstats.Stats(self._main, stream=stream)
+        for profile in profiles:
+            stats.add(profile)
+        return stats, stream
+
+    def report(self, limit=25, out=print):
+        stats, stream = self.stats()
+        stats.sort_stats("tottime").print_stats(limit)
+        out(f"🔬 cProfile of the harness ({stats.total_calls} calls, {stats.total_tt * 1000:.0f}ms)")
+        out(stream.getvalue().rstrip())
+
+    def dump(self, path):
+        stats, _ = self.stats()
+        stats.dump_stats(path)
+
+
+PROFILERS = {"sample": SamplingProfiler, "cprofile": CProfileProfiler}
+
+
+class ProfileSession:
+    """Context manager running the profiler chosen on the command line, if any"""
+
+    def __init__(self, args):
+        self.mode = getattr(args, "profile", None)
+        self.out_path = getattr(args, "profile_out", None)
+        self.profiler = None
+        if self.mode == "sample":
+            self.profiler = SamplingProfiler(getattr(args, "profile_interval", DEFAULT_INTERVAL))
+        elif self.mode:
+            self.profiler = PROFILERS[self.mode]()
+
+    def __enter__(self):
+        if self.profiler is not None:
+            self.profiler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def report(self):
+        if self.profiler is None:
+            return
+        print()
+        self.profiler.report()
+        if self.out_path:
+            self.profiler.dump(self.out_path)
+            print(f"💾 Profile written to {self.out_path}")
+
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", choices=sorted(PROFILERS),
+                        help="Attribute the harness's own CPU time to functions")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="Write the profile (collapsed stacks for sample, pstats for cprofile)")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL,
+                        help="Seconds between stack samples with --profile sample")
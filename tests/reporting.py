@@ -0,0 +1,218 @@
+"""
+Structured result export for the SubversePay API testing suite.
+Every log_test record is streamed to JSONL, JUnit XML and a Prometheus text-exposition
+file while the run is in progress; no sink keeps per-record state in memory.
+"""
+
+import json
+import os
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+# Path segments that are resource IDs, collapsed so metric label sets stay bounded
+_ID_SEGMENT_PARENTS = {"merchants", "alerts", "settlements"}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def route_template(endpoint):
+    """'merchants/8f1c.../kyc' -> 'merchants/:id/kyc'"""
+    parts = endpoint.strip("/").split("/")
+    if len(parts) > 1 and parts[0] in _ID_SEGMENT_PARENTS:
+        parts[1] = ":id"
+    return "/".join(parts)
+
+
+def record_key(record):
+    """'GET merchants?kyc_status=approved' - method, route template and sorted query params"""
+    key = f"{record.get('method')} {route_template(record['endpoint'])}"
+    if record.get("params"):
+        key += "?" + "&".join(f"{k}={v}" for k, v in sorted(record["params"].items()))
+    return key
+
+
+class JsonlSink:
+    """One JSON object per line, flushed per record so a crashed run keeps its results"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JUnitSink:
+    """Streams <testcase> elements; suite totals are patched into the header on close"""
+
+    _COUNT_WIDTH = 10
+
+    def __init__(self, path, suite_name="backend_test"):
+        self._file = open(path, "w+", encoding="utf-8")
+        self._tests = 0
+        self._failures = 0
+        self._time = 0.0
+        self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        self._header_at = self._file.tell()
+        self._file.write(self._header(suite_name))
+        self._suite_name = suite_name
+
+    def _header(self, suite_name):
+        width = self._COUNT_WIDTH
+        return (f'  <testsuite name={quoteattr(suite_name)} tests="{self._tests:0{width}d}" '
+                f'failures="{self._failures:0{width}d}" errors="{0:0{width}d}" '
+                f'time="{self._time:0{width + 4}.3f}">\n')
+
+    def write(self, record):
+        self._tests += 1
+        duration = record.get("duration") or 0.0
+        self._time += duration
+        classname = record.get("suite") or record.get("endpoint") or self._suite_name
+        self._file.write(f'    <testcase classname={quoteattr(str(classname))} '
+                         f'name={quoteattr(record["test"])} time="{duration:.6f}">')
+        if not record["passed"]:
+            self._failures += 1
+            self._file.write(f'<failure message={quoteattr(str(record["details"])[:200])}>'
+                             f'{escape(str(record["details"]))}</failure>')
+        elif record.get("details"):
+            self._file.write(f'<system-out>{escape(str(record["details"]))}</system-out>')
+        self._file.write("</testcase>\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.write("  </testsuite>\n</testsuites>\n")
+        # Fixed-width counters keep the header the same length, so it can be rewritten in place
+        self._file.seek(self._header_at)
+        self._file.write(self._header(self._suite_name))
+        self._file.close()
+
+
+class _EndpointMetrics:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.phases = {"connect": 0.0, "ttfb": 0.0, "body": 0.0}
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+class PrometheusSink:
+    """Aggregates records per method/route/status and rewrites a text-exposition file.
+
+    The file is replaced atomically every `flush_every` records or `flush_interval`
+    seconds, so a node_exporter textfile collector always sees a complete snapshot.
+    """
+
+    def __init__(self, path, flush_every=20, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._checks = {True: 0, False: 0}
+        self._endpoints = {}
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        self._last_exchange = None
+
+    def write(self, record):
+        self._checks[bool(record["passed"])] += 1
+        # Consecutive records of one check share its request; count that request once
+        new_request = record.get("exchange_id") != self._last_exchange
+        self._last_exchange = record.get("exchange_id")
+        # Fixture-cache hits made no request, so they have no latency to report
+        if (new_request and record.get("endpoint") is not None and record.get("duration") is not None
+                and not record.get("cached")):
+            key = (record["method"], route_template(record["endpoint"]), str(record.get("status")))
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = _EndpointMetrics()
+            metrics.count += 1
+            metrics.duration += record["duration"]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if record["duration"] <= bound:
+                    metrics.buckets[i] += 1
+            for phase in metrics.phases:
+                metrics.phases[phase] += record.get(phase) or 0.0
+            metrics.request_bytes += record.get("request_bytes") or 0
+            metrics.response_bytes += record.get("response_bytes") or 0
+
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def _lines(self):
+        yield "# HELP backend_test_checks_total API test checks by result."
+        yield "# TYPE backend_test_checks_total counter"
+        yield f'backend_test_checks_total{{result="pass"}} {self._checks[True]}'
+        yield f'backend_test_checks_total{{result="fail"}} {self._checks[False]}'
+
+        yield "# HELP backend_test_request_duration_seconds API request latency."
+        yield "# TYPE backend_test_request_duration_seconds histogram"
+        for (method, route, status), m in sorted(self._endpoints.items()):
+            labels = f'method="{method}",endpoint="{route}",status="{status}"'
+            for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                yield f'backend_test_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'
+            yield f'backend_test_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.count}'
+            yield f"backend_test_request_duration_seconds_sum{{{labels}}} {m.duration:.6f}"
+            yield f"backend_test_request_duration_seconds_count{{{labels}}} {m.count}"
+
+        yield "# HELP backend_test_request_phase_seconds_total Time spent per request phase."
+        yield "# TYPE backend_test_request_phase_seconds_total counter"
+        for (method, route, status), m in sorted(self._endpoints.items()):
+            for phase, total in m.phases.items():
+                yield (f'backend_test_request_phase_seconds_total{{method="{method}",endpoint="{route}",'
+                       f'status="{status}",phase="{phase}"}} {total:.6f}')
+
+        yield "# HELP backend_test_bytes_total Request and response body bytes."
+        yield "# TYPE backend_test_bytes_total counter"
+        for (method, route, status), m in sorted(self._endpoints.items()):
+            labels = f'method="{method}",endpoint="{route}",status="{status}"'
+            yield f'backend_test_bytes_total{{{labels},direction="request"}} {m.request_bytes}'
+            yield f'backend_test_bytes_total{{{labels},direction="response"}} {m.response_bytes}'
+
+    def flush(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(self._lines()) + "\n")
+        os.replace(tmp, self.path)
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+class ResultRecorder:
+    """Fans each record out to the configured sinks"""
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    @classmethod
+    def from_args(cls, args):
+        sinks = []
+        if getattr(args, "jsonl", None):
+            sinks.append(JsonlSink(args.jsonl))
+        if getattr(args, "junit", None):
+            sinks.append(JUnitSink(args.junit))
+        if getattr(args, "prometheus", None):
+            sinks.append(PrometheusSink(args.prometheus))
+        return cls(sinks)
+
+    def write(self, record):
+        for sink in self.sinks:
+            sink.write(record)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def add_report_arguments(parser):
+    parser.add_argument("--jsonl", metavar="PATH", help="Stream per-check records as JSON lines")
+    parser.add_argument("--junit", metavar="PATH", help="Stream per-check results as JUnit XML")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="Keep a Prometheus text-exposition file of request metrics updated")
@@ -0,0 +1,461 @@
+"""
+Pagination and filter scalability sweep for the SubversePay list endpoints.
+Every filter combination of GET /merchants (kyc_status x vertical), /alerts (status x
+severity) and /settlements (status) is timed against growing --local datasets, and a
+power law (latency ~ n^k) is fitted to latency, rows returned and payload bytes. Each
+list is also probed for limit/offset and cursor pagination; where the server honours
+them, a page is timed at increasing offsets and along a cursor walk.
+
+    python -m tests.scaling --local --sizes 500,1000,2000,4000,8000,16000 --json scaling.json
+    python -m tests.scaling --base-url https://staging.example.com/api    # one size: probes and offsets
+
+Latency is fitted net of the floor, the median latency of GET /system-health requests
+interleaved one-for-one with the timed requests at the same size, so the fixed cost of
+a request does not hide how a list grows; sizes at which a route takes under twice the
+floor are left out of its latency fit. A fit needs MIN_FIT_POINTS sizes before it flags
+or projects anything, and its point count is reported with it. Flags:
+
+    O(n) / superlinear   latency exponent >= 0.9 / >= 1.3
+    scan                 at the largest size a filter takes a far bigger share of the
+                         unfiltered list's latency than of its rows: the server reads
+                         rows the filter discards, usually a missing index
+    page grows with n    a fixed-size first page gets slower as the dataset grows
+    deep offset          the deepest page (or cursor page) is 2x or more slower than the first
+
+For each route the dataset size at which the fit crosses --budget-ms, and at which the
+payload crosses the payload benchmark's wire-size limit, is projected: the point by
+which that list must be paginated.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import statistics
+import sys
+
+from backend_test import BASE_URL
+from tests.payload import MAX_WIRE_BYTES
+from tests.stub_server import (ALERT_SEVERITIES, ALERT_STATUSES, KYC_STATUSES, SETTLEMENT_STATUSES, VERTICALS,
+                               add_local_arguments, start_local_server)
+from tests.transport import HTTPTransport
+
+# List resource -> query parameter -> the values it filters on
+LIST_FILTERS = {
+    "merchants": {"kyc_status": KYC_STATUSES, "vertical": VERTICALS},
+    "alerts": {"status": ALERT_STATUSES, "severity": ALERT_SEVERITIES},
+    "settlements": {"status": SETTLEMENT_STATUSES},
+}
+
+DEFAULT_SIZES = "500,1000,2000,4000,8000,16000"
+DEFAULT_REPEAT = 5
+DEFAULT_BUDGET_MS = 200.0
+PAGE_SIZE = 50
+OFFSET_FRACTIONS = (0.0, 0.25, 0.5, 0.75, 0.99)
+CURSOR_PAGES = 20
+# Top-level (or "pagination" object) keys a cursor-paginated response may carry
+CURSOR_KEYS = ("next_cursor", "cursor", "next")
+LINEAR_EXPONENT = 0.9
+SUPERLINEAR_EXPONENT = 1.3
+# A filter returning under half the rows is flagged when its share of the latency is this multiple of its share of rows
+SCAN_RATIO = 2.0
+# Two points always fit a line perfectly; fewer than this many sizes prove nothing
+MIN_FIT_POINTS = 3
+# Latency fits this poorly correlated are noise, not a growth curve
+MIN_FIT_R = 0.9
+PAGE_GROWTH_EXPONENT = 0.5
+DEEP_OFFSET_RATIO = 2.0
+
+
+def combinations(resource):
+    """Every filter combination of `resource`, unfiltered first: [{}, {'status': 'active'}, ...]"""
+    filters = LIST_FILTERS[resource]
+    choices = [[None] + list(values) for values in filters.values()]
+    return [{name: value for name, value in zip(filters, chosen) if value is not None}
+            for chosen in itertools.product(*choices)]
+
+
+def route_name(resource, params):
+    return f"{resource}?{'&'.join(f'{name}={value}' for name, value in params.items())}" if params else resource
+
+
+def fit_power(points):
+    """Least-squares fit of log y on log x: exponent, coefficient, r and points, or None with too few points"""
+    points = [(x, y) for x, y in points if x and y and x > 0 and y > 0]
+    if len({x for x, _ in points}) < 2:
+        return None
+    xs = [math.log(x) for x, _ in points]
+    ys = [math.log(y) for _, y in points]
+    mx, my = statistics.fmean(xs), statistics.fmean(ys)
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    exponent = sxy / sxx
+    r = sxy / math.sqrt(sxx * syy) if syy else 1.0
+    return {"exponent": exponent, "coefficient": math.exp(my - exponent * mx), "r": r, "points": len(points)}
+
+
+def _trusted(fit):
+    """`fit` when it has enough points to flag or project from, else None"""
+    return fit if fit is not None and fit["points"] >= MIN_FIT_POINTS else None
+
+
+def crossing(fit, limit):
+    """Dataset size at which the fitted curve reaches `limit`, or None when it does not grow"""
+    if fit is None or fit["exponent"] <= 0.05 or limit <= 0:
+        return None
+    return (limit / fit["coefficient"]) ** (1 / fit["exponent"])
+
+
+class Point:
+    """Median of the timed requests for one route at one dataset size"""
+
+    def __init__(self, size, latency, ttfb, response_bytes, records):
+        self.size = size
+        self.latency = latency
+        self.ttfb = ttfb
+        self.bytes = response_bytes
+        self.records = records
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class RouteSweep:
+    def __init__(self, resource, params):
+        self.resource = resource
+        self.params = params
+        self.name = route_name(resource, params)
+        self.points = []
+        self.fits = {}
+        self.flags = []
+        self.projections = {}
+        self.error = None
+
+    def analyse(self, floors, budget, unfiltered=None):
+        # A point within twice the floor is mostly fixed cost; subtracting the floor from it leaves noise
+        net = [(p.size, p.latency - floors.get(p.size, 0.0)) for p in self.points
+               if p.latency > 2 * floors.get(p.size, 0.0)]
+        self.fits = {
+            "latency": fit_power(net),
+            "records": fit_power([(p.size, p.records) for p in self.points]),
+            "bytes": fit_power([(p.size, p.bytes) for p in self.points]),
+        }
+        latency = _trusted(self.fits["latency"])
+        if latency and latency["r"] >= MIN_FIT_R:
+            if latency["exponent"] >= SUPERLINEAR_EXPONENT:
+                self.flags.append(f"superlinear (n^{latency['exponent']:.2f})")
+            elif latency["exponent"] >= LINEAR_EXPONENT:
+                self.flags.append("O(n)")
+        if not self.points:
+            return
+        point, floor = self.points[-1], floors.get(self.points[-1].size, 0.0)
+        if unfiltered is not None and unfiltered is not self and unfiltered.points:
+            reference = unfiltered.points[-1]
+            row_share = point.records / reference.records if reference.records else 0.0
+            latency_share = (point.latency - floor) / (reference.latency - floor) if reference.latency > floor else 0.0
+            if row_share < 0.5 and latency_share >= SCAN_RATIO * row_share:
+                self.flags.append(f"scan ({row_share:.0%} of rows, {latency_share:.0%} of the time)")
+        self.projections = {
+            "budget_size": crossing(latency, budget - floor),
+            "wire_size": crossing(_trusted(self.fits["bytes"]), MAX_WIRE_BYTES),
+        }
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "resource": self.resource,
+            "params": self.params,
+            "points": [point.to_dict() for point in self.points],
+            "fits": self.fits,
+            "flags": self.flags,
+            "projections": self.projections,
+            "error": self.error,
+        }
+
+
+class Pagination:
+    """What a list resource's server honours, and how its pages scale"""
+
+    def __init__(self, resource):
+        self.resource = resource
+        self.limit = None
+        self.offset = None
+        self.cursor = None  # how the next page is named: "cursor", "link" or None
+        self.first_page = []  # (size, seconds) of limit=PAGE_SIZE at offset 0
+        self.offsets = {}  # size -> [(offset, seconds)]
+        self.cursor_walk = []  # (page index, seconds)
+        self.flags = []
+        self.error = None
+
+    @property
+    def supported(self):
+        return bool(self.limit or self.cursor)
+
+    def describe(self):
+        def mark(value):
+            return "✓" if value else "✗"
+        cursor = "✓ (Link header)" if self.cursor == "link" else mark(self.cursor)
+        parts = [f"limit {mark(self.limit)}", f"offset {mark(self.offset)}", f"cursor {cursor}"]
+        return f"{self.resource:<14}{'  '.join(parts)}"
+
+    def analyse(self):
+        page = _trusted(fit_power(self.first_page))
+        if page and page["exponent"] >= PAGE_GROWTH_EXPONENT:
+            self.flags.append(f"page grows with n (n^{page['exponent']:.2f})")
+        if self.offsets:
+            deepest = self.offsets[max(self.offsets)]
+            if len(deepest) > 1 and deepest[0][1] > 0:
+                ratio = deepest[-1][1] / deepest[0][1]
+                if ratio >= DEEP_OFFSET_RATIO:
+                    self.flags.append(f"deep offset: offset {deepest[-1][0]:,} is {ratio:.1f}x the first page")
+        if len(self.cursor_walk) > 1 and self.cursor_walk[0][1] > 0:
+            ratio = self.cursor_walk[-1][1] / self.cursor_walk[0][1]
+            if ratio >= DEEP_OFFSET_RATIO:
+                self.flags.append(f"cursor page {self.cursor_walk[-1][0]} is {ratio:.1f}x the first")
+
+    def to_dict(self):
+        return {
+            "resource": self.resource,
+            "limit": self.limit,
+            "offset": self.offset,
+            "cursor": self.cursor,
+            "first_page": self.first_page,
+            "offsets": self.offsets,
+            "cursor_walk": self.cursor_walk,
+            "flags": self.flags,
+            "error": self.error,
+        }
+
+
+def _next_page(response, body):
+    """('cursor', value) or ('link', url) naming the page after `response`, or None"""
+    link = response.links.get("next") if hasattr(response, "links") else None
+    if link and link.get("url"):
+        return "link", str(link["url"])
+    for holder in (body, body.get("pagination") if isinstance(body.get("pagination"), dict) else {}):
+        for key in CURSOR_KEYS:
+            value = holder.get(key)
+            if isinstance(value, (str, int)) and value != "":
+                return "cursor", value
+    return None
+
+
+class ScalingSweep:
+    def __init__(self, base_url, transport, repeat=DEFAULT_REPEAT):
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport
+        self.repeat = repeat
+        self.floor_samples = []
+
+    def _get(self, path, params=None, url=None):
+        """(response, parsed body, records in data)"""
+        response = self.transport.request("GET", url or f"{self.base_url}/{path}", params=params)
+        response.raise_for_status()
+        body = response.json()
+        data = body.get("data") if isinstance(body, dict) else None
+        return response, body if isinstance(body, dict) else {}, data if isinstance(data, list) else []
+
+    def time(self, path, params=None, size=None):
+        """Median of `repeat` requests after one warm-up, as a Point; each is preceded by a floor sample"""
+        self._get(path, params)
+        latencies, ttfbs = [], []
+        response_bytes = records = 0
+        for _ in range(self.repeat):
+            response, _, _ = self._get("system-health")
+            self.floor_samples.append(response.timing.duration)
+            response, _, data = self._get(path, params)
+            latencies.append(response.timing.duration)
+            ttfbs.append(response.timing.ttfb)
+            response_bytes, records = len(response.content), len(data)
+        return Point(size, statistics.median(latencies), statistics.median(ttfbs), response_bytes, records)
+
+    def floor(self):
+        """Median of the floor samples taken alongside every timed request so far"""
+        return statistics.median(self.floor_samples) if self.floor_samples else 0.0
+
+    def sweep_filters(self, routes, size):
+        for route in routes:
+            try:
+                route.points.append(self.time(route.resource, route.params, size))
+            except Exception as e:
+                route.error = repr(e)
+
+    def probe(self, pagination):
+        """Detect limit, offset and cursor support by whether the server's answer changes"""
+        _, _, everything = self._get(pagination.resource)
+        if len(everything) < 2:
+            pagination.error = "fewer than 2 records; pagination cannot be detected"
+            return
+        response, body, first = self._get(pagination.resource, {"limit": 1})
+        pagination.limit = len(first) == 1
+        next_page = _next_page(response, body)
+        pagination.cursor = next_page[0] if next_page else None
+        if pagination.limit:
+            _, _, second = self._get(pagination.resource, {"limit": 1, "offset": 1})
+            pagination.offset = len(second) == 1 and second[0] != first[0]
+
+    def sweep_pages(self, pagination, size, total):
+        if pagination.limit:
+            pagination.first_page.append(
+                (size, self.time(pagination.resource, {"limit": PAGE_SIZE}, size).latency))
+        if pagination.offset:
+            offsets = sorted({min(int(total * fraction), max(total - PAGE_SIZE, 0)) for fraction in OFFSET_FRACTIONS})
+            pagination.offsets[size] = [
+                (offset, self.time(pagination.resource, {"limit": PAGE_SIZE, "offset": offset}, size).latency)
+                for offset in offsets]
+
+    def walk_cursor(self, pagination):
+        """Time each page of a cursor walk from the start, up to CURSOR_PAGES pages"""
+        params = {"limit": PAGE_SIZE} if pagination.limit else {}
+        response, body, _ = self._get(pagination.resource, params)
+        walk = [(0, response.timing.duration)]
+        while len(walk) < CURSOR_PAGES:
+            next_page = _next_page(response, body)
+            if next_page is None:
+                break
+            kind, value = next_page
+            if kind == "link":
+                response, body, _ = self._get(pagination.resource, url=value)
+            else:
+                response, body, _ = self._get(pagination.resource, {**params, "cursor": value})
+            walk.append((len(walk), response.timing.duration))
+        pagination.cursor_walk = walk
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def _exponent(fit):
+    return "-" if fit is None else f"{fit['exponent']:.2f}"
+
+
+def _points(fit):
+    return "-" if fit is None else str(fit["points"])
+
+
+def _rows(value):
+    if value is None:
+        return "-"
+    return f"{value:,.0f}" if value < 1e9 else ">1e9"
+
+
+def report(routes, paginations, sizes, budget):
+    largest = sizes[-1]
+    scope = (f"Sizes {', '.join(f'{size:,}' for size in sizes)}; figures at {largest:,}" if largest is not None
+             else "Live server, one dataset size")
+    header = (f"{'Route':<50}{'Rows':>9}{'KB':>10}{'ms':>9}{'Lat k':>7}{'Pts':>5}{'Rows k':>8}{'Bytes k':>8}"
+              f"{f'n@{budget:g}ms':>12}{'n@wire':>12}  Flags")
+    print(f"{scope}; k = fitted exponent of n over Pts sizes, flagged from {MIN_FIT_POINTS}")
+    print(header)
+    print("-" * len(header))
+    for route in routes:
+        if route.error:
+            print(f"{route.name:<50}  ❌ {route.error}")
+            continue
+        point = route.points[-1]
+        print(f"{route.name:<50}{point.records:>9,}{point.bytes / 1024:>10,.1f}{_ms(point.latency):>9}"
+              f"{_exponent(route.fits.get('latency')):>7}{_points(route.fits.get('latency')):>5}"
+              f"{_exponent(route.fits.get('records')):>8}"
+              f"{_exponent(route.fits.get('bytes')):>8}{_rows(route.projections.get('budget_size')):>12}"
+              f"{_rows(route.projections.get('wire_size')):>12}  {', '.join(route.flags)}")
+    print()
+    print("Pagination")
+    for pagination in paginations:
+        if pagination.error:
+            print(f"{pagination.resource:<14}❌ {pagination.error}")
+            continue
+        note = "" if pagination.supported else "  -> unbounded: every request returns the whole filtered list"
+        print(pagination.describe() + note)
+        for size, points in sorted(pagination.offsets.items()):
+            at = f" @{size:,}" if size is not None else ""
+            print(f"{'':<14}offsets{at}: " + ", ".join(f"{offset:,}={_ms(s)}ms" for offset, s in points))
+        if pagination.cursor_walk:
+            print(f"{'':<14}cursor walk: " + ", ".join(f"#{i}={_ms(s)}ms" for i, s in pagination.cursor_walk))
+        for flag in pagination.flags:
+            print(f"⚠️  {pagination.resource}: {flag}")
+    for pagination in paginations:
+        flagged = [route for route in routes if route.resource == pagination.resource and route.flags]
+        sizes_due = [route.projections["budget_size"] for route in flagged if route.projections.get("budget_size")]
+        if not flagged:
+            continue
+        scans = sum(1 for route in flagged if any(flag.startswith("scan") for flag in route.flags))
+        when = f"; at {budget:g}ms, paginate before ~{_rows(min(sizes_due))} rows" if sizes_due else ""
+        index = f"; {scans} filter(s) scan: index them" if scans else ""
+        print(f"⚠️  {pagination.resource}: {len(flagged)} of "
+              f"{sum(1 for route in routes if route.resource == pagination.resource)} routes flagged{index}{when}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Filter and pagination scalability sweep for list endpoints")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="With --local, comma-separated dataset sizes to sweep")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed requests per route and size")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Latency budget the projected pagination point is computed for")
+    parser.add_argument("--resources", default=",".join(LIST_FILTERS),
+                        help="Comma-separated list resources to sweep")
+    parser.add_argument("--json", metavar="PATH", help="Write the points, fits and pagination data as JSON")
+    add_local_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    resources = [name for name in args.resources.split(",") if name]
+    unknown = set(resources) - set(LIST_FILTERS)
+    if unknown:
+        print(f"❌ Unknown list resource(s): {', '.join(sorted(unknown))}")
+        return 2
+    sizes = sorted({int(size) for size in args.sizes.split(",")}) if args.local else [None]
+    routes = [RouteSweep(resource, params) for resource in resources for params in combinations(resource)]
+    paginations = [Pagination(resource) for resource in resources]
+    floors = {}
+
+    with HTTPTransport() as transport:
+        for index, size in enumerate(sizes):
+            server = start_local_server(argparse.Namespace(**{**vars(args), "dataset_size": size}))
+            size = size if server else None
+            sweep = ScalingSweep(server.base_url if server else args.base_url, transport, args.repeat)
+            try:
+                try:
+                    sweep._get("system-health")
+                except Exception as e:
+                    print(f"❌ {sweep.base_url} did not answer GET /system-health: {e!r}")
+                    return 1
+                sweep.sweep_filters(routes, size)
+                totals = {route.resource: route.points[-1].records for route in routes
+                          if not route.params and route.points and route.points[-1].size == size}
+                for pagination in paginations:
+                    try:
+                        if index == 0:
+                            sweep.probe(pagination)
+                        sweep.sweep_pages(pagination, size, totals.get(pagination.resource, 0))
+                        if pagination.cursor and size == sizes[-1]:
+                            sweep.walk_cursor(pagination)
+                    except Exception as e:
+                        pagination.error = repr(e)
+            finally:
+                floors[size] = sweep.floor()
+                if server:
+                    server.stop()
+
+    unfiltered = {route.resource: route for route in routes if not route.params and not route.error}
+    for route in routes:
+        route.analyse(floors, args.budget_ms / 1000, unfiltered.get(route.resource))
+    for pagination in paginations:
+        pagination.analyse()
+    print()
+    report(routes, paginations, sizes, args.budget_ms)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"sizes": sizes, "budget_ms": args.budget_ms, "floors": floors,
+                       "routes": [route.to_dict() for route in routes],
+                       "pagination": [pagination.to_dict() for pagination in paginations]}, f, indent=2)
+    return 0 if all(not r.error for r in routes) and all(not p.error for p in paginations) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
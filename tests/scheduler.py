@@ -0,0 +1,251 @@
+"""
+Dependency-graph scheduler for the SubversePay API testing suite.
+Checks declare the checks they must run after; independent checks run concurrently on a
+thread pool while results are still reported in declaration order.
+"""
+
+import heapq
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = 8
+
+_local = threading.local()
+
+
+def current_outcome():
+    """Outcome of the check running on this thread, or None outside a scheduled run"""
+    return getattr(_local, "outcome", None)
+
+
+class Check:
+    def __init__(self, name, func, after=(), suite=None):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        # Ordering-only edges: wait for these checks to finish, whatever their outcome
+        self.waits = ()
+        self.suite = suite
+
+    @property
+    def upstream(self):
+        return self.after + self.waits
+
+
+class CheckOutcome:
+    """Result of one check: buffered log entries, gate value and timing"""
+
+    def __init__(self, check):
+        self.check = check
+        self.logs = []
+        self.result = None
+        self.error = None
+        self.skipped = False
+        self.started = 0.0
+        self.finished = 0.0
+
+    @property
+    def duration(self):
+        return self.finished - self.started
+
+    @property
+    def unblocks(self):
+        """Whether checks declared after this one may run"""
+        return not self.skipped and self.error is None and self.result is not False
+
+
+class CheckGraph:
+    """Ordered set of checks with 'after' edges.
+
+    A check returning False (or raising) blocks its dependents, which are then skipped
+    without logging anything - the same as the early returns in the sequential suites.
+    Declaration order must be a topological order of the 'after' edges; it is also the
+    reporting order. Ordering-only edges (`wait`) may point at checks declared later.
+    """
+
+    def __init__(self):
+        self.checks = []
+        self.suites = {}
+        self._by_name = {}
+        self._suite = None
+
+    def suite(self, key, title):
+        """Start a new suite; checks added afterwards belong to it"""
+        self.suites[key] = title
+        self._suite = key
+
+    def add(self, name, func, after=()):
+        if name in self._by_name:
+            raise ValueError(f"Duplicate check: {name}")
+        for dep in after:
+            if dep not in self._by_name:
+                raise ValueError(f"Check {name} depends on undeclared check {dep}")
+        check = Check(name, func, after, self._suite)
+        self.checks.append(check)
+        self._by_name[name] = check
+        return check
+
+    def _reaches(self, start, target):
+        """Whether `start` transitively waits for, or depends on, `target`"""
+        seen, stack = set(), [start]
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name not in seen:
+                seen.add(name)
+                stack.extend(self._by_name[name].upstream)
+        return False
+
+    def wait(self, name, for_checks):
+        """Order `name` after `for_checks` without letting their failures block it.
+
+        Used for writes, which must not run while reads of the data they change are in
+        flight. Names not in the graph are ignored, so selected sub-graphs can reuse it.
+        """
+        if name not in self._by_name:
+            return
+        check = self._by_name[name]
+        for other in for_checks:
+            if other not in self._by_name or other in check.upstream:
+                continue
+            if self._reaches(other, name):
+                raise ValueError(f"Check {name} waiting for {other} would form a cycle")
+            check.waits += (other,)
+
+    def select(self, names=None, suites=None, rank=None):
+        """Sub-graph with the given checks/suites plus everything they depend on.
+
+        With `rank` ({check name: sort key}) checks are declared, and so started and
+        reported, in rank order wherever their dependencies allow; a dependency takes the
+        best rank of the checks that need it. Otherwise declaration order is kept.
+        """
+        wanted = set(names or ())
+        if suites:
+            wanted.update(c.name for c in self.checks if c.suite in suites)
+        stack = list(wanted)
+        while stack:
+            for dep in self._by_name[stack.pop()].after:
+                if dep not in wanted:
+                    wanted.add(dep)
+                    stack.append(dep)
+
+        selected = [check for check in self.checks if check.name in wanted]
+        if rank is not None:
+            selected = self._ranked(selected, rank)
+        graph = CheckGraph()
+        graph.suites = dict(self.suites)
+        for check in selected:
+            graph._suite = check.suite
+            graph.add(check.name, check.func, check.after)
+        for check in selected:
+            graph.wait(check.name, check.waits)
+        return graph
+
+    @staticmethod
+    def _ranked(checks, rank):
+        """Topological order of `checks` preferring lower rank, then declaration order"""
+        best = {}
+        for check in reversed(checks):
+            key = min(rank.get(check.name, float("inf")), best.get(check.name, float("inf")))
+            best[check.name] = key
+            for dep in check.after:
+                best[dep] = min(best.get(dep, float("inf")), key)
+
+        names = {check.name for check in checks}
+        position = {check.name: i for i, check in enumerate(checks)}
+        upstream = {check.name: [dep for dep in check.upstream if dep in names] for check in checks}
+        remaining = {check.name: len(upstream[check.name]) for check in checks}
+        dependents = defaultdict(list)
+        for check in checks:
+            for dep in upstream[check.name]:
+                dependents[dep].append(check)
+        ready = [(best[c.name], position[c.name], c) for c in checks if not remaining[c.name]]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            _, _, check = heapq.heappop(ready)
+            ordered.append(check)
+            for child in dependents[check.name]:
+                remaining[child.name] -= 1
+                if remaining[child.name] == 0:
+                    heapq.heappush(ready, (best[child.name], position[child.name], child))
+        return ordered
+
+    def _execute(self, check, ctx):
+        outcome = CheckOutcome(check)
+        _local.outcome = outcome
+        outcome.started = time.perf_counter()
+        try:
+            outcome.result = check.func(ctx)
+        except Exception as e:
+            outcome.error = e
+        finally:
+            outcome.finished = time.perf_counter()
+            _local.outcome = None
+        return outcome
+
+    def run(self, max_workers=DEFAULT_MAX_WORKERS, on_complete=None, ctx=None):
+        """Run all checks, calling on_complete(outcome) in declaration order; returns outcomes"""
+        ctx = {} if ctx is None else ctx
+        remaining = {c.name: len(c.upstream) for c in self.checks}
+        blocked = defaultdict(bool)
+        dependents = defaultdict(list)
+        waiters = defaultdict(list)
+        for check in self.checks:
+            for dep in check.after:
+                dependents[dep].append(check)
+            for dep in check.waits:
+                waiters[dep].append(check)
+
+        outcomes = {}
+        flushed = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {}
+
+            def settle(outcome):
+                outcomes[outcome.check.name] = outcome
+                for child in dependents[outcome.check.name]:
+                    blocked[child.name] |= not outcome.unblocks
+                for child in dependents[outcome.check.name] + waiters[outcome.check.name]:
+                    remaining[child.name] -= 1
+                    if remaining[child.name] == 0:
+                        if blocked[child.name]:
+                            skipped = CheckOutcome(child)
+                            skipped.skipped = True
+                            settle(skipped)
+                        else:
+                            futures[pool.submit(self._execute, child, ctx)] = child
+
+            for check in self.checks:
+                if not check.upstream:
+                    futures[pool.submit(self._execute, check, ctx)] = check
+
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del futures[future]
+                    settle(future.result())
+                while flushed < len(self.checks) and self.checks[flushed].name in outcomes:
+                    if on_complete:
+                        on_complete(outcomes[self.checks[flushed].name])
+                    flushed += 1
+
+        return [outcomes[c.name] for c in self.checks]
+
+    def critical_path(self, outcomes):
+        """Duration of the longest dependency chain in a finished run"""
+        by_name = {outcome.check.name: outcome for outcome in outcomes}
+        finish = {}
+
+        def finished(name):
+            if name not in finish:
+                outcome = by_name[name]
+                before = max((finished(dep) for dep in outcome.check.upstream if dep in by_name), default=0.0)
+                finish[name] = before + outcome.duration
+            return finish[name]
+
+        return max((finished(name) for name in by_name), default=0.0)
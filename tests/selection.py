@@ -0,0 +1,240 @@
+"""
+Incremental test selection driven by test_result.md.
+The backend tasks in test_result.md are mapped to APITester checks by the endpoint in
+their name ("PATCH /api/merchants/:id/kyc - ..."). Only tasks that need retesting run,
+in the order the test_plan asks for, and each task's outcome is appended to its
+status_history when the run finishes. Results are only written back when the run
+targeted the live BASE_URL, never from --local or --replay runs.
+
+    python backend_test.py --test-result test_result.md            # retest what changed
+    python backend_test.py --test-result test_result.md --plan     # show the selection only
+
+Selection: every backend task when test_plan.test_all is set (or with --all-tasks),
+otherwise tasks with needs_retesting, plus those named in current_focus or stuck_tasks.
+Order (test_plan.test_priority): sequential keeps file order, high_first sorts by
+priority, stuck_first puts stuck tasks (highest stuck_count first) ahead of the rest.
+
+Requires PyYAML (pip install pyyaml).
+"""
+
+import json
+import os
+import re
+
+from tests.reporting import route_template
+
+# "METHOD route" -> the checks that exercise it
+ROUTE_CHECKS = {
+    "GET analytics/overview": ("analytics.overview",),
+    "GET merchants": ("merchants.list", "merchants.kyc_filter", "merchants.vertical_filter"),
+    "GET merchants/:id": ("merchants.get", "merchants.get_invalid"),
+    "POST merchants": ("merchants.create", "edge.merchant_missing_fields"),
+    "PATCH merchants/:id/kyc": ("merchants.kyc_approve", "merchants.kyc_reject", "merchants.kyc_invalid"),
+    "GET analytics/merchants": ("analytics.merchants",),
+    "GET analytics/verticals": ("analytics.verticals",),
+    "GET alerts": ("alerts.list", "alerts.status_filter", "alerts.severity_filter"),
+    "PATCH alerts/:id": ("alerts.update", "alerts.update_invalid"),
+    "GET settlements": ("settlements.list", "settlements.status_filter"),
+    "GET system-health": ("system_health",),
+}
+
+PRIORITIES = {"high": 0, "medium": 1, "low": 2}
+ORDERS = ("high_first", "sequential", "stuck_first")
+DEFAULT_ORDER = "high_first"
+
+_TASK_ENDPOINT = re.compile(r"^(GET|POST|PUT|PATCH|DELETE)\s+/api/(\S+)")
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise RuntimeError("Selecting tests from test_result.md requires PyYAML: pip install pyyaml")
+    return yaml
+
+
+def task_route(name):
+    """'PATCH /api/merchants/:id/kyc - Approve...' -> 'PATCH merchants/:id/kyc', or None"""
+    match = _TASK_ENDPOINT.match(name)
+    if not match:
+        return None
+    return f"{match.group(1)} {route_template(match.group(2))}"
+
+
+class Task:
+    def __init__(self, data, position):
+        self.name = str(data.get("task", ""))
+        self.position = position
+        self.priority = str(data.get("priority", "medium"))
+        self.stuck_count = int(data.get("stuck_count") or 0)
+        self.needs_retesting = bool(data.get("needs_retesting"))
+        self.working = data.get("working")
+        self.route = task_route(self.name)
+        self.checks = ROUTE_CHECKS.get(self.route, ())
+        self.passed = None
+        self.comment = ""
+
+    def sort_key(self, order, stuck):
+        priority = PRIORITIES.get(self.priority, len(PRIORITIES))
+        if order == "sequential":
+            return (self.position,)
+        if order == "stuck_first":
+            is_stuck = self.name in stuck or self.stuck_count > 0
+            return (not is_stuck, -self.stuck_count, priority, self.position)
+        return (priority, self.position)
+
+
+class TaskSelection:
+    """Backend tasks of a test_result.md file, the subset to run and their results"""
+
+    def __init__(self, path, text, document, all_tasks=False):
+        self.path = path
+        self.text = text
+        plan = document.get("test_plan") or {}
+        self.tasks = [Task(data, i) for i, data in enumerate(document.get("backend") or [])]
+        self.order = plan.get("test_priority") if plan.get("test_priority") in ORDERS else DEFAULT_ORDER
+        focus = set(plan.get("current_focus") or ())
+        stuck = set(plan.get("stuck_tasks") or ())
+        everything = all_tasks or bool(plan.get("test_all"))
+        chosen = [task for task in self.tasks if everything or task.needs_retesting
+                  or task.name in focus or task.name in stuck]
+        chosen.sort(key=lambda task: task.sort_key(self.order, stuck))
+        self.selected = [task for task in chosen if task.checks]
+        self.unmapped = [task for task in chosen if not task.checks]
+
+    @classmethod
+    def load(cls, path, all_tasks=False):
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        return cls(path, text, _yaml().safe_load(text) or {}, all_tasks)
+
+    def graph(self, full_graph):
+        """The checks of the selected tasks (plus their dependencies) in task order"""
+        rank = {}
+        for index, task in enumerate(self.selected):
+            for name in task.checks:
+                rank.setdefault(name, index)
+        return full_graph.select(names=rank, rank=rank)
+
+    def describe(self):
+        lines = [f"🎯 {len(self.selected)} of {len(self.tasks)} backend tasks selected ({self.order})"]
+        for task in self.selected:
+            stuck = f", stuck {task.stuck_count}x" if task.stuck_count else ""
+            lines.append(f"   • [{task.priority}{stuck}] {task.name} -> {', '.join(task.checks)}")
+        for task in self.unmapped:
+            lines.append(f"   ⚠️  No checks cover '{task.name}'; its status is left unchanged")
+        return "\n".join(lines)
+
+    def record(self, outcomes):
+        """Derive each selected task's result from the check outcomes of a run"""
+        by_name = {outcome.check.name: outcome for outcome in outcomes}
+        for task in self.selected:
+            passed, failures, blocked = 0, [], []
+            for name in task.checks:
+                outcome = by_name.get(name)
+                if outcome is None or outcome.skipped:
+                    blocked.append(name)
+                    continue
+                if outcome.error is not None:
+                    failures.append(f"{name}: unhandled error {outcome.error!r}")
+                for test_name, ok, details, _ in outcome.logs:
+                    if ok:
+                        passed += 1
+                    else:
+                        failures.append(f"{test_name}: {details}")
+            task.passed = not failures and not blocked
+            if task.passed:
+                task.comment = f"✅ backend_test.py: all {passed} checks passed"
+            else:
+                problems = failures + [f"{name} blocked by a failed dependency" for name in blocked]
+                task.comment = f"❌ backend_test.py: {len(problems)} problem(s): " + "; ".join(problems[:5])
+
+    def updated_text(self):
+        """test_result.md with results written into the selected tasks; all other text kept as is"""
+        lines = self.text.splitlines(keepends=True)
+        for task in self.selected:
+            if task.passed is not None:
+                lines = _update_task(lines, task)
+        text = _bump_sequence("".join(lines))
+        _yaml().safe_load(text)  # never write back a file the agents could no longer parse
+        return text
+
+    def write_back(self):
+        text = self.updated_text()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+
+def _task_block(lines, name):
+    """(first, end, field indent) of the task whose `- task:` value is `name`"""
+    yaml = _yaml()
+    for i, line in enumerate(lines):
+        match = re.match(r"^(\s*)- task:\s*(.+?)\s*$", line)
+        if match and str(yaml.safe_load(match.group(2))) == name:
+            dash = len(match.group(1))
+            end = i + 1
+            while end < len(lines) and (not lines[end].strip() or _indent(lines[end]) > dash):
+                end += 1
+            while end > i + 1 and not lines[end - 1].strip():
+                end -= 1
+            return i, end, " " * (dash + 2)
+    return None
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip(" "))
+
+
+def _update_task(lines, task):
+    block = _task_block(lines, task.name)
+    if block is None:
+        return lines
+    first, end, indent = block
+    stuck_count = 0 if task.passed else task.stuck_count + 1
+    values = {"working": "true" if task.passed else "false", "needs_retesting": "false",
+              "stuck_count": str(stuck_count)}
+    history_at = None
+    for i in range(first, end):
+        field = re.match(rf"^{indent}(\w+):", lines[i])
+        if not field:
+            continue
+        if field.group(1) in values:
+            lines[i] = f"{indent}{field.group(1)}: {values[field.group(1)]}\n"
+        elif field.group(1) == "status_history":
+            history_at = i
+
+    entry_indent = indent + "  "
+    if history_at is None:
+        lines.insert(end, f"{indent}status_history:\n")
+        history_at, end = end, end + 1
+    elif history_at + 1 < end:
+        entry_indent = " " * _indent(lines[history_at + 1])
+    # The history runs to the next field at the task's own indentation, or the end of the block
+    insert_at = history_at + 1
+    while insert_at < end and (not lines[insert_at].strip() or _indent(lines[insert_at]) > len(indent)):
+        insert_at += 1
+    while insert_at > history_at + 1 and not lines[insert_at - 1].strip():
+        insert_at -= 1
+    lines[insert_at:insert_at] = [
+        f"{entry_indent}- working: {values['working']}\n",
+        f"{entry_indent}  agent: \"testing\"\n",
+        f"{entry_indent}  comment: {json.dumps(task.comment, ensure_ascii=False)}\n",
+    ]
+    return lines
+
+
+def _bump_sequence(text):
+    return re.sub(r"^(\s+test_sequence:\s*)(\d+)", lambda m: f"{m.group(1)}{int(m.group(2)) + 1}", text,
+                  count=1, flags=re.MULTILINE)
+
+
+def add_selection_arguments(parser):
+    parser.add_argument("--test-result", metavar="PATH",
+                        help="Run only the backend tasks test_result.md marks for retesting, then record "
+                             "results (live BASE_URL runs only)")
+    parser.add_argument("--all-tasks", action="store_true", help="With --test-result, retest every mapped task")
+    parser.add_argument("--plan", action="store_true", help="With --test-result, print the selection and exit")
+    parser.add_argument("--no-write-back", action="store_true",
+                        help="With --test-result, leave the file unchanged after the run")
@@ -0,0 +1,289 @@
+"""
+Soak mode for the SubversePay API testing suite.
+Cycles through every APITester suite for hours or days and keeps only constant-memory
+rolling statistics per endpoint: windowed latency histograms, error rates and a running
+least-squares fit of response size over time. Latency drift, growing payloads and
+rising error rates are flagged as soon as a window closes.
+
+    python -m tests.soak --duration 24h --window 5m
+    python -m tests.soak --local --duration 30m --window 30s --jsonl soak.jsonl
+"""
+
+import argparse
+import math
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from backend_test import BASE_URL, APITester
+from tests.histogram import LatencyHistogram
+from tests.reporting import ResultRecorder, add_report_arguments, record_key
+from tests.stub_server import add_local_arguments, start_local_server
+from tests.transport import HTTPTransport
+
+# 1% precision keeps a window's histogram to a few KB
+SIGNIFICANT_FIGURES = 2
+# Below this a growing payload is noise (e.g. counters gaining a digit), whatever its rate
+MIN_SIZE_SLOPE = 1024
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """'90' / '90s' / '15m' / '24h' / '2d' -> seconds"""
+    match = _DURATION.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Invalid duration: {text}")
+    return float(match.group(1)) * _UNITS[match.group(2)]
+
+
+class _Window:
+    def __init__(self):
+        self.histogram = LatencyHistogram(significant_figures=SIGNIFICANT_FIGURES)
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.requests if self.requests else 0.0
+
+
+class _SizeTrend:
+    """Running least-squares fit of response bytes against hours since start"""
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+
+    def add(self, hours, size):
+        self.n += 1
+        self.sx += hours
+        self.sy += size
+        self.sxx += hours * hours
+        self.sxy += hours * size
+        self.syy += size * size
+
+    @property
+    def mean(self):
+        return self.sy / self.n if self.n else 0.0
+
+    def fit(self):
+        """(bytes per hour, correlation) or (0, 0) while there is too little spread"""
+        if self.n < 3:
+            return 0.0, 0.0
+        vx = self.n * self.sxx - self.sx ** 2
+        vy = self.n * self.syy - self.sy ** 2
+        if vx <= 0 or vy <= 0:
+            return 0.0, 0.0
+        cov = self.n * self.sxy - self.sx * self.sy
+        return cov / vx, cov / math.sqrt(vx * vy)
+
+
+class RouteStats:
+    """Rolling statistics for one method + route"""
+
+    def __init__(self, keep):
+        self.windows = deque(maxlen=keep)
+        self.current = _Window()
+        self.baseline = None
+        self._baseline_windows = 0
+        self.size = _SizeTrend()
+        self.requests = 0
+        self.errors = 0
+        self.flags = set()
+
+    def record(self, hours, latency, ok, size):
+        self.requests += 1
+        self.current.requests += 1
+        if latency is not None:
+            self.current.histogram.record_seconds(latency)
+        if not ok:
+            self.errors += 1
+            self.current.errors += 1
+        if size is not None:
+            self.size.add(hours, size)
+
+    def close_window(self, baseline_windows, min_samples):
+        window, self.current = self.current, _Window()
+        self.windows.append(window)
+        if window.requests >= min_samples and self._baseline_windows < baseline_windows:
+            self.baseline = self.baseline or _Window()
+            self.baseline.histogram.merge(window.histogram)
+            self.baseline.requests += window.requests
+            self.baseline.errors += window.errors
+            self._baseline_windows += 1
+            return None
+        return window
+
+    @property
+    def baselined(self):
+        return self.baseline is not None and self._baseline_windows > 0
+
+    def rolling(self):
+        combined = _Window()
+        for window in self.windows:
+            combined.histogram.merge(window.histogram)
+            combined.requests += window.requests
+            combined.errors += window.errors
+        return combined
+
+
+class SoakMonitor:
+    """Result-recorder sink that keeps rolling per-endpoint statistics and raises flags.
+
+    Memory is bounded by routes x `keep` windows, whatever the run length.
+    """
+
+    def __init__(self, window=300.0, keep=12, baseline_windows=3, min_samples=20, latency_drift=0.5,
+                 error_threshold=0.01, size_growth=0.01, out=print):
+        self.window = window
+        self.keep = keep
+        self.baseline_windows = baseline_windows
+        self.min_samples = min_samples
+        self.latency_drift = latency_drift
+        self.error_threshold = error_threshold
+        self.size_growth = size_growth
+        self.out = out
+        self.routes = {}
+        self.started = time.perf_counter()
+        self._window_start = self.started
+        self._last_exchange = None
+        self.windows_closed = 0
+        self.cycles = 0
+
+    def write(self, record):
+        # Consecutive records of one check share its request; count that request once
+        if record.get("exchange_id") == self._last_exchange:
+            return
+        self._last_exchange = record.get("exchange_id")
+        if record.get("endpoint") is None or record.get("cached"):
+            return
+        key = record_key(record)
+        stats = self.routes.get(key)
+        if stats is None:
+            stats = self.routes[key] = RouteStats(self.keep)
+        ok = bool(record["passed"]) and record.get("error") is None and (record.get("status") or 0) < 500
+        hours = ((record.get("start") or time.perf_counter()) - self.started) / 3600
+        stats.record(hours, record.get("duration"), ok, record.get("response_bytes"))
+        self.tick()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        while now - self._window_start >= self.window:
+            self._window_start += self.window
+            self._close_window()
+
+    def _close_window(self):
+        self.windows_closed += 1
+        requests = errors = 0
+        for key, stats in self.routes.items():
+            window = stats.close_window(self.baseline_windows, self.min_samples)
+            requests += stats.windows[-1].requests
+            errors += stats.windows[-1].errors
+            if window is not None:
+                self._evaluate(key, stats, window)
+        elapsed = time.perf_counter() - self.started
+        rate = errors / requests * 100 if requests else 0.0
+        self.out(f"🕒 {datetime.now().strftime('%H:%M:%S')} window {self.windows_closed} "
+                 f"({elapsed / 3600:.2f}h, {self.cycles} cycles): {requests} requests, {rate:.2f}% errors")
+
+    def _flag(self, key, stats, name, active, message):
+        if active and name not in stats.flags:
+            stats.flags.add(name)
+            self.out(f"⚠️  {key}: {message}")
+        elif not active and name in stats.flags:
+            stats.flags.discard(name)
+            self.out(f"✅ {key}: {name} cleared")
+
+    def _evaluate(self, key, stats, window):
+        if stats.baselined and window.requests >= self.min_samples:
+            base = stats.baseline.histogram.percentiles((50, 99))
+            now = window.histogram.percentiles((50, 99))
+            drift = now[99] / base[99] - 1 if base[99] else 0.0
+            self._flag(key, stats, "latency drift", drift > self.latency_drift,
+                       f"p99 {now[99] / 1000:.1f}ms vs baseline {base[99] / 1000:.1f}ms (+{drift * 100:.0f}%)")
+            rising = (window.error_rate >= self.error_threshold
+                      and window.error_rate > 2 * stats.baseline.error_rate)
+            self._flag(key, stats, "error rate", rising,
+                       f"error rate {window.error_rate * 100:.2f}% vs baseline {stats.baseline.error_rate * 100:.2f}%")
+        slope, correlation = stats.size.fit()
+        growth = slope / stats.size.mean if stats.size.mean else 0.0
+        self._flag(key, stats, "payload growth", growth > self.size_growth and slope > MIN_SIZE_SLOPE and correlation > 0.5,
+                   f"response size growing {slope:,.0f} bytes/h ({growth * 100:.1f}%/h, r={correlation:.2f})")
+
+    def report(self):
+        header = (f"{'Endpoint':<40}{'Reqs':>8}{'Err%':>7}{'Base p50':>10}{'Base p99':>10}"
+                  f"{'Roll p50':>10}{'Roll p99':>10}{'Bytes/h':>13}  Flags")
+        self.out(header)
+        self.out("-" * len(header))
+        for key, stats in sorted(self.routes.items()):
+            rolling = stats.rolling()
+            rolling.histogram.merge(stats.current.histogram)
+            now = rolling.histogram.percentiles((50, 99))
+            base = stats.baseline.histogram.percentiles((50, 99)) if stats.baselined else None
+            slope, _ = stats.size.fit()
+            base_text = (f"{base[50] / 1000:>8.1f}ms{base[99] / 1000:>8.1f}ms" if base else f"{'-':>10}{'-':>10}")
+            self.out(f"{key:<40}{stats.requests:>8}{stats.errors / stats.requests * 100:>7.2f}{base_text}"
+                     f"{now[50] / 1000:>8.1f}ms{now[99] / 1000:>8.1f}ms{slope:>13,.0f}  {', '.join(sorted(stats.flags))}")
+
+    def close(self):
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test the SubversePay /api endpoints")
+    parser.add_argument("--base-url", default=BASE_URL, help="API base URL including the /api prefix")
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("1h"), help="Run length, e.g. 24h")
+    parser.add_argument("--window", type=parse_duration, default=parse_duration("5m"), help="Rolling window length")
+    parser.add_argument("--keep", type=int, default=12, help="Windows kept for rolling percentiles")
+    parser.add_argument("--baseline-windows", type=int, default=3, help="Windows that form the latency baseline")
+    parser.add_argument("--interval", type=parse_duration, default=0.0, help="Pause between suite cycles")
+    parser.add_argument("--latency-drift", type=float, default=0.5, help="Flag p99 above baseline by this fraction")
+    parser.add_argument("--error-threshold", type=float, default=0.01, help="Flag window error rates above this")
+    parser.add_argument("--size-growth", type=float, default=0.01,
+                        help="Flag response sizes growing by more than this fraction per hour")
+    parser.add_argument("--workers", type=int, default=4, help="Checks in flight at once")
+    add_local_arguments(parser)
+    add_report_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = start_local_server(args)
+    base_url = server.base_url if server else args.base_url
+    monitor = SoakMonitor(args.window, args.keep, args.baseline_windows, latency_drift=args.latency_drift,
+                          error_threshold=args.error_threshold, size_growth=args.size_growth)
+    recorder = ResultRecorder.from_args(args)
+    recorder.sinks.insert(0, monitor)
+
+    print(f"🚀 Soak test against {base_url} for {args.duration / 3600:g}h ({args.window:g}s windows)")
+    end = time.perf_counter() + args.duration
+    with HTTPTransport() as transport:
+        tester = APITester(base_url=base_url, transport=transport, max_workers=args.workers, recorder=recorder,
+                           result_limit=1000, verbose=False)
+        try:
+            while time.perf_counter() < end:
+                tester.run_checks(tester.build_graph())
+                monitor.cycles += 1
+                monitor.tick()
+                if args.interval:
+                    time.sleep(min(args.interval, max(end - time.perf_counter(), 0)))
+        except KeyboardInterrupt:
+            print("\n⏹️  Interrupted")
+        finally:
+            recorder.close()
+    if server:
+        server.stop()
+
+    print()
+    monitor.report()
+    flagged = any(stats.flags for stats in monitor.routes.values())
+    print(f"\n✅ Passed: {tester.passed_tests}  ❌ Failed: {tester.failed_tests}  🔁 Cycles: {monitor.cycles}")
+    return 0 if not tester.failed_tests and not flagged else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Streaming, constant-memory validation of large /api list responses.
+Items of the top-level "data" array are decoded one at a time while the body downloads,
+checked against required fields and equality filters, and then discarded.
+"""
+
+import codecs
+import json
+import re
+
+_WS = re.compile(r"[ \t\n\r]*")
+_ITEM_SEPARATOR = re.compile(r"[ \t\n\r]*,?[ \t\n\r]*")
+
+
+class StreamFormatError(ValueError):
+    """The body is not a JSON object with the expected array"""
+
+
+def iter_array_items(chunks, key="data"):
+    """Yield the items of `key` in a top-level JSON object from an iterable of byte chunks.
+
+    Only the item being decoded (plus the unread tail of the current chunk) is held in
+    memory. Closing the generator early stops reading.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        try:
+            text = utf8.decode(next(chunks))
+        except StopIteration:
+            eof = True
+            text = utf8.decode(b"", final=True)
+        buf = buf[pos:] + text
+        pos = 0
+        return not eof or bool(text)
+
+    def peek():
+        """Next non-whitespace character, or None at end of input"""
+        nonlocal pos
+        while True:
+            pos = _WS.match(buf, pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    def decode():
+        nonlocal pos
+        while True:
+            if peek() is None:
+                raise StreamFormatError("Response body ended early")
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A value ending exactly at the buffer edge may be a truncated number
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise StreamFormatError(f"Invalid JSON at offset {e.pos}: {e.msg}") from e
+            fill()
+
+    if peek() != "{":
+        raise StreamFormatError("Response is not a JSON object")
+    pos += 1
+    while True:
+        c = peek()
+        if c == "}" or c is None:
+            raise StreamFormatError(f"Response has no '{key}' array")
+        if c == ",":
+            pos += 1
+            continue
+        name = decode()
+        if peek() != ":":
+            raise StreamFormatError("Malformed object in response")
+        pos += 1
+        if name != key:
+            decode()
+            continue
+        if peek() != "[":
+            raise StreamFormatError(f"'{key}' is not an array")
+        pos += 1
+        raw_decode = decoder.raw_decode
+        separator = _ITEM_SEPARATOR.match
+        while True:
+            # Fast path: the next item lies entirely inside the current buffer
+            start = separator(buf, pos).end()
+            if start < len(buf) and buf[start] != "]":
+                try:
+                    value, end = raw_decode(buf, start)
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    if end < len(buf):
+                        pos = end
+                        yield value
+                        continue
+            c = peek()
+            if c == "]":
+                return
+            if c == ",":
+                pos += 1
+                continue
+            if c is None:
+                raise StreamFormatError("Response body ended early")
+            yield decode()
+
+
+class StreamValidation:
+    """Outcome of validating a streamed list: item count, first item and first violation"""
+
+    def __init__(self):
+        self.count = 0
+        self.first = None
+        self.violation = None
+
+    @property
+    def ok(self):
+        return self.violation is None
+
+
+def validate_items(items, required_fields=(), filters=None):
+    """Check each item as it arrives; stops at the first violation.
+
+    filters maps a field to the value every item must have (the server-side filter
+    semantics of ?kyc_status=, ?status= and so on).
+    """
+    filters = filters or {}
+    required = tuple(required_fields) + tuple(f for f in filters if f not in required_fields)
+    result = StreamValidation()
+    index = -1
+    for index, item in enumerate(items):
+        if index == 0:
+            result.first = item
+        if not isinstance(item, dict):
+            result.violation = (index, f"item {index} is not an object")
+            break
+        missing = [f for f in required if f not in item]
+        if missing:
+            result.violation = (index, f"item {index} is missing {', '.join(missing)}")
+            break
+        for field, expected in filters.items():
+            if item[field] != expected:
+                result.violation = (index, f"item {index} has {field}={item[field]!r}, expected {expected!r}")
+                break
+        if result.violation:
+            break
+    result.count = index + 1 if result.violation is None else index
+    return result
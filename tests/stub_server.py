@@ -0,0 +1,458 @@
+"""
+Local in-process stand-in for the SubversePay /api contract (README_API_INTEGRATION.md).
+Serves every route the APITester suites cover, including 404 paths and the merchant,
+alert and settlement filters, from a dataset generated deterministically from a seed.
+
+    python -m tests.stub_server --size 100000 --port 8000
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+VERTICALS = ["Cable/DTH", "ISP", "Gym/Fitness"]
+KYC_STATUSES = ["pending", "approved", "rejected"]
+ALERT_TYPES = ["fraud", "churn", "settlement", "risk"]
+ALERT_SEVERITIES = ["high", "medium", "low"]
+ALERT_STATUSES = ["active", "resolved"]
+SETTLEMENT_STATUSES = ["pending", "processing", "completed"]
+
+DEFAULT_SIZE = 100
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+_DAYS = [(_EPOCH + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(366)]
+_CLOCK = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(86400)]
+
+
+def _uuids(rng, count):
+    """`count` random version-4 UUID strings (uuid.UUID is too slow for million-row datasets)"""
+    raw = rng.randbytes(16 * count).hex() if count else ""
+    ids = []
+    for start in range(0, 32 * count, 32):
+        h = raw[start:start + 32]
+        ids.append(f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}")
+    return ids
+
+
+def _timestamp(random, days=365):
+    day, second = divmod(int(random() * days * 86400), 86400)
+    return f"{_DAYS[day]}T{_CLOCK[second]}Z"
+
+
+def _weighted(random, values, cumulative):
+    """rng.choices for one value, without its per-call setup cost"""
+    point = random() * cumulative[-1]
+    for value, bound in zip(values, cumulative):
+        if point < bound:
+            return value
+    return values[-1]
+
+
+def health_score(merchant):
+    """Health score as documented for GET /api/analytics/merchants"""
+    return 100 - merchant["churn_rate"] * 2 + merchant["monthly_growth"] * 0.5
+
+
+class Dataset:
+    """In-memory merchants, alerts and settlements with the /api query semantics"""
+
+    def __init__(self, merchants, alerts, settlements, seed=0):
+        self.merchants = merchants
+        self.alerts = alerts
+        self.settlements = settlements
+        self.lock = threading.RLock()
+        self._merchants_by_id = {m["id"]: m for m in merchants}
+        self._alerts_by_id = {a["id"]: a for a in alerts}
+        self._rng = random.Random(seed ^ 0x5EED)
+
+    @classmethod
+    def generate(cls, merchants=DEFAULT_SIZE, alerts=None, settlements=None, seed=0):
+        """Build a dataset of the given sizes; the same seed always yields the same data"""
+        alerts = merchants if alerts is None else alerts
+        settlements = merchants if settlements is None else settlements
+        # Millions of fresh dicts would trigger repeated full GC passes; none of them are cyclic
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            rows = cls._generate_rows(merchants, alerts, settlements, random.Random(seed))
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return cls(*rows, seed)
+
+    @staticmethod
+    def _generate_rows(merchants, alerts, settlements, rng):
+        # Bound methods and rnd() * n instead of randrange/choice/uniform: this loop
+        # has to produce a million rows per resource in seconds, not minutes
+        rnd = rng.random
+        merchant_ids = _uuids(rng, merchants)
+        alert_ids = _uuids(rng, alerts)
+        settlement_ids = _uuids(rng, settlements)
+
+        merchant_rows = []
+        for i in range(merchants):
+            vertical = VERTICALS[i % 3] if i < 3 else VERTICALS[int(rnd() * 3)]
+            subscribers = 500 + int(rnd() * 49_500)
+            arpu = round(150 + rnd() * 1350, 2)
+            merchant_rows.append({
+                "id": merchant_ids[i],
+                "name": f"Merchant {i + 1:07d}",
+                "vertical": vertical,
+                # The first merchant is always approved so filters and analytics are never empty
+                "kyc_status": "approved" if i == 0 else _weighted(rnd, KYC_STATUSES, (15, 90, 100)),
+                "active_subscribers": subscribers,
+                "tpv": round(subscribers * arpu, 2),
+                "churn_rate": round(1.5 + rnd() * 13.5, 2),
+                "monthly_growth": round(-5.0 + rnd() * 35.0, 1),
+                "avg_arpu": arpu,
+                "contact_email": f"ops{i + 1}@merchant.example",
+                "contact_phone": f"+91 9{int(rnd() * 10 ** 9):09d}",
+                "created_at": _timestamp(rnd),
+            })
+
+        missing = {"id": None, "name": None}
+        alert_rows = []
+        for i in range(alerts):
+            merchant = merchant_rows[int(rnd() * merchants)] if merchants else missing
+            alert_type = ALERT_TYPES[int(rnd() * 4)]
+            alert_rows.append({
+                "id": alert_ids[i],
+                "type": alert_type,
+                "severity": "high" if i == 0 else ALERT_SEVERITIES[int(rnd() * 3)],
+                "merchant_id": merchant["id"],
+                "merchant_name": merchant["name"],
+                "message": f"{alert_type.capitalize()} signal detected for {merchant['name']}",
+                "status": "active" if i == 0 else _weighted(rnd, ALERT_STATUSES, (70, 100)),
+                "created_at": _timestamp(rnd, days=30),
+            })
+
+        settlement_rows = []
+        for i in range(settlements):
+            merchant = merchant_rows[int(rnd() * merchants)] if merchants else missing
+            created_at = _timestamp(rnd, days=90)
+            settlement_rows.append({
+                "id": settlement_ids[i],
+                "merchant_id": merchant["id"],
+                "merchant_name": merchant["name"],
+                "amount": round(10_000 + rnd() * 4_990_000, 2),
+                "status": "completed" if i == 0 else SETTLEMENT_STATUSES[int(rnd() * 3)],
+                "transaction_count": 10 + int(rnd() * 19_990),
+                "payout_date": created_at[:10],
+                "created_at": created_at,
+            })
+
+        return merchant_rows, alert_rows, settlement_rows
+
+    def list_merchants(self, kyc_status=None, vertical=None):
+        with self.lock:
+            rows = self.merchants
+            if kyc_status:
+                rows = [m for m in rows if m.get("kyc_status") == kyc_status]
+            if vertical:
+                rows = [m for m in rows if m.get("vertical") == vertical]
+            return list(rows)
+
+    def get_merchant(self, merchant_id):
+        with self.lock:
+            return self._merchants_by_id.get(merchant_id)
+
+    def create_merchant(self, body):
+        with self.lock:
+            merchant = dict(body)
+            merchant.update({
+                "id": _uuids(self._rng, 1)[0],
+                "kyc_status": "pending",
+                "active_subscribers": 0,
+                "tpv": 0,
+                "churn_rate": 0,
+                "monthly_growth": 0,
+                "avg_arpu": 0,
+                "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            })
+            self.merchants.append(merchant)
+            self._merchants_by_id[merchant["id"]] = merchant
+            return merchant
+
+    def update_kyc(self, merchant_id, status):
+        with self.lock:
+            merchant = self._merchants_by_id.get(merchant_id)
+            if merchant is not None:
+                merchant["kyc_status"] = status
+            return merchant
+
+    def list_alerts(self, status=None, severity=None):
+        with self.lock:
+            rows = self.alerts
+            if status:
+                rows = [a for a in rows if a["status"] == status]
+            if severity:
+                rows = [a for a in rows if a["severity"] == severity]
+            return list(rows)
+
+    def get_alert(self, alert_id):
+        with self.lock:
+            return self._alerts_by_id.get(alert_id)
+
+    def update_alert(self, alert_id, status):
+        with self.lock:
+            alert = self._alerts_by_id.get(alert_id)
+            if alert is not None:
+                alert["status"] = status
+            return alert
+
+    def list_settlements(self, status=None):
+        with self.lock:
+            if status:
+                return [s for s in self.settlements if s["status"] == status]
+            return list(self.settlements)
+
+    def overview(self):
+        with self.lock:
+            merchants = self.merchants
+            count = len(merchants)
+            approved = [m for m in merchants if m["kyc_status"] == "approved"]
+            return {
+                "total_merchants": count,
+                "active_merchants": sum(1 for m in approved if m["active_subscribers"] > 0),
+                "pending_kyc": sum(1 for m in merchants if m["kyc_status"] == "pending"),
+                "total_subscribers": sum(m["active_subscribers"] for m in merchants),
+                "total_tpv": sum(m["tpv"] for m in merchants),
+                "avg_churn_rate": f"{sum(m['churn_rate'] for m in merchants) / count:.2f}" if count else "0.00",
+                "active_alerts": sum(1 for a in self.alerts if a["status"] == "active"),
+                "monthly_growth": round(sum(m["monthly_growth"] for m in approved) / len(approved), 1) if approved else 0,
+            }
+
+    def merchant_analytics(self):
+        with self.lock:
+            return [{
+                "id": m["id"],
+                "name": m.get("name"),
+                "vertical": m.get("vertical"),
+                "subscribers": m["active_subscribers"],
+                "tpv": m["tpv"],
+                "churn_rate": m["churn_rate"],
+                "growth": m["monthly_growth"],
+                "health_score": health_score(m),
+            } for m in self.merchants if m["kyc_status"] == "approved"]
+
+    def vertical_analytics(self):
+        with self.lock:
+            totals = {v: [0, 0, 0, 0.0, 0.0] for v in VERTICALS}
+            for m in self.merchants:
+                bucket = totals.get(m.get("vertical"))
+                if bucket is not None:
+                    bucket[0] += 1
+                    bucket[1] += m["active_subscribers"]
+                    bucket[2] += m["tpv"]
+                    bucket[3] += m["churn_rate"]
+                    bucket[4] += m["monthly_growth"]
+            return [{
+                "name": name,
+                "merchants": n,
+                "subscribers": subscribers,
+                "tpv": tpv,
+                "avg_churn": round(churn / n, 2) if n else 0,
+                "avg_growth": round(growth / n, 2) if n else 0,
+            } for name, (n, subscribers, tpv, churn, growth) in totals.items()]
+
+    def system_health(self):
+        with self.lock:
+            return {
+                "api_uptime": 99.98,
+                "razorpay_status": "operational",
+                "supabase_status": "operational",
+                "avg_response_time": 145,
+                "total_requests_today": 45678,
+                "failed_requests_today": 23,
+                "last_updated": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        # Headers and body in one write so small responses are a single segment
+        self._headers_buffer.append(b"\r\n")
+        self._headers_buffer.append(body)
+        self.flush_headers()
+
+    def _ok(self, data, status=200):
+        self._reply(status, {"success": True, "data": data})
+
+    def _error(self, status, message):
+        self._reply(status, {"success": False, "error": message})
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if not parts or parts[0] != "api":
+            return None, {}
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return parts[1:], query
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return None
+
+    def do_GET(self):
+        parts, query = self._route()
+        dataset = self.server.dataset
+        if parts == ["merchants"]:
+            return self._ok(dataset.list_merchants(query.get("kyc_status"), query.get("vertical")))
+        if parts and len(parts) == 2 and parts[0] == "merchants":
+            merchant = dataset.get_merchant(parts[1])
+            if merchant is None:
+                return self._error(404, "Merchant not found")
+            return self._ok(merchant)
+        if parts == ["analytics", "overview"]:
+            return self._ok(dataset.overview())
+        if parts == ["analytics", "merchants"]:
+            return self._ok(dataset.merchant_analytics())
+        if parts == ["analytics", "verticals"]:
+            return self._ok(dataset.vertical_analytics())
+        if parts == ["alerts"]:
+            return self._ok(dataset.list_alerts(query.get("status"), query.get("severity")))
+        if parts == ["settlements"]:
+            return self._ok(dataset.list_settlements(query.get("status")))
+        if parts == ["system-health"]:
+            return self._ok(dataset.system_health())
+        self._error(404, "Not found")
+
+    def do_POST(self):
+        parts, _ = self._route()
+        body = self._body()
+        if parts == ["merchants"]:
+            if not isinstance(body, dict):
+                return self._error(400, "Invalid JSON body")
+            return self._ok(self.server.dataset.create_merchant(body), status=201)
+        self._error(404, "Not found")
+
+    def do_PATCH(self):
+        parts, _ = self._route()
+        body = self._body()
+        dataset = self.server.dataset
+        if parts and len(parts) == 3 and parts[0] == "merchants" and parts[2] == "kyc":
+            status = body.get("status") if isinstance(body, dict) else None
+            if dataset.get_merchant(parts[1]) is None:
+                return self._error(404, "Merchant not found")
+            if status not in ("approved", "rejected"):
+                return self._error(400, "status must be approved or rejected")
+            return self._ok(dataset.update_kyc(parts[1], status))
+        if parts and len(parts) == 2 and parts[0] == "alerts":
+            status = body.get("status") if isinstance(body, dict) else None
+            if dataset.get_alert(parts[1]) is None:
+                return self._error(404, "Alert not found")
+            if status not in ALERT_STATUSES:
+                return self._error(400, "status must be resolved or active")
+            return self._ok(dataset.update_alert(parts[1], status))
+        self._error(404, "Not found")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, dataset):
+        self.dataset = dataset
+        super().__init__(address, _Handler)
+
+    def handle_error(self, request, client_address):
+        # Streaming clients close the connection as soon as they have seen enough
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Runs the stand-in API on a background thread.
+
+        with StubServer(Dataset.generate(10_000, seed=7)) as server:
+            tester = APITester(base_url=server.base_url)
+    """
+
+    def __init__(self, dataset=None, host="127.0.0.1", port=0):
+        self.dataset = dataset if dataset is not None else Dataset.generate()
+        self._server = _Server((host, port), self.dataset)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_local_arguments(parser):
+    """--local/--dataset-size/--seed options shared by the harness entry points"""
+    parser.add_argument("--local", action="store_true",
+                        help="Run against an in-process stand-in server instead of --base-url")
+    parser.add_argument("--dataset-size", type=int, default=DEFAULT_SIZE,
+                        help="Merchants, alerts and settlements generated for --local")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the --local dataset")
+
+
+def start_local_server(args):
+    """Start the stand-in server requested on the command line, or return None"""
+    if not getattr(args, "local", False):
+        return None
+    server = StubServer(Dataset.generate(args.dataset_size, seed=args.seed))
+    server.start()
+    print(f"🧪 Local stand-in server with {args.dataset_size} records/resource (seed {args.seed}) at {server.base_url}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the SubversePay /api contract from a seeded dataset")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Merchants, alerts and settlements to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = StubServer(Dataset.generate(args.size, seed=args.seed), args.host, args.port)
+    print(f"🧪 Serving {args.size} records/resource (seed {args.seed}) at {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Concurrent runs of the check graph must report exactly what a sequential run would."""
+
+from backend_test import APITester
+from tests.stub_server import Dataset, StubServer
+from tests.transport import HTTPTransport
+
+RUNS = 8
+
+
+def _run(max_workers):
+    with StubServer(Dataset.generate(200, seed=3)) as server, HTTPTransport() as transport:
+        tester = APITester(base_url=server.base_url, transport=transport, max_workers=max_workers, verbose=False)
+        tester.run_checks()
+    return [(result["test"], result["passed"], result["details"]) for result in tester.test_results]
+
+
+def test_concurrent_runs_match_sequential_run():
+    expected = _run(max_workers=1)
+    assert all(passed for _, passed, _ in expected)
+    for _ in range(RUNS):
+        assert _run(max_workers=8) == expected
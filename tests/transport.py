@@ -0,0 +1,260 @@
+"""
+Shared HTTP transport for the SubversePay API testing suite.
+One pooled keep-alive client is used for every request the tester makes, so timings
+reflect the /api handlers rather than TCP/TLS connection setup.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 10
+# Hosts with a cached pool; the tools talk to one API host (plus redirects)
+DEFAULT_HOST_POOLS = 4
+
+
+def _instrumented_pool_classes(on_connect):
+    """Build urllib3 pool classes whose connections report every new connect"""
+
+    class _HTTPConnection(HTTPConnection):
+        def connect(self):
+            started = time.perf_counter()
+            super().connect()
+            on_connect(time.perf_counter() - started)
+
+    class _HTTPSConnection(HTTPSConnection):
+        def connect(self):
+            started = time.perf_counter()
+            super().connect()
+            on_connect(time.perf_counter() - started)
+
+    class _HTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _HTTPConnection
+
+    class _HTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _HTTPSConnection
+
+    return {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools count the connections they open"""
+
+    def __init__(self, on_connect, **kwargs):
+        self._pool_classes = _instrumented_pool_classes(on_connect)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+
+class RequestTiming:
+    """Monotonic (perf_counter) timestamps and phase durations of one request.
+
+    connect is TCP+TLS setup when a new connection was opened (0 on reuse), ttfb runs
+    from sending the request to receiving the response headers, body is the read of the
+    response body (None for streamed responses, which the caller reads itself).
+    """
+
+    def __init__(self, started, connect, headers_at, finished, request_bytes, response_bytes):
+        self.started = started
+        self.finished = finished
+        self.connect = connect
+        self.ttfb = max(headers_at - started - connect, 0.0)
+        self.body = finished - headers_at if response_bytes is not None else None
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+
+    @property
+    def duration(self):
+        return self.finished - self.started
+
+    def finish_stream(self, finished, response_bytes):
+        """Close out a streamed response once the caller has read its body"""
+        self.body = finished - self.finished
+        self.finished = finished
+        self.response_bytes = response_bytes
+
+    def to_dict(self):
+        return {
+            "start": self.started,
+            "end": self.finished,
+            "duration": self.duration,
+            "connect": self.connect,
+            "ttfb": self.ttfb,
+            "body": self.body,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+
+def buffered_response(status_code, headers, body, url, timing):
+    """A requests.Response around an already-read body, served without a network round trip"""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+    response._content = body
+    response._content_consumed = True
+    response.timing = timing
+    return response
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    return len(body.encode() if isinstance(body, str) else body)
+
+
+class HTTPTransport:
+    """Pooled keep-alive HTTP client shared by all APITester request helpers.
+
+    pool_size bounds the number of open connections per host; callers beyond it
+    wait for a free connection instead of opening a throwaway one. With http2=True
+    the transport uses httpx (HTTP/2 is negotiated via ALPN on https:// URLs only).
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, http2=False, max_retries=0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.http2 = http2
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+        self._connect_time = 0.0
+        self._local = threading.local()
+
+        if http2:
+            try:
+                import httpx
+            except ImportError:
+                raise RuntimeError("HTTP/2 transport requires httpx: pip install 'httpx[http2]'")
+            self._httpx = httpx
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            self._client = httpx.Client(http2=True, limits=limits, timeout=timeout)
+        else:
+            self._client = requests.Session()
+            adapter = _PooledAdapter(
+                self._record_connect,
+                pool_connections=DEFAULT_HOST_POOLS,
+                pool_maxsize=pool_size,
+                pool_block=True,
+                max_retries=max_retries,
+            )
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+
+    def _record_connect(self, duration):
+        self._local.connect = getattr(self._local, "connect", 0.0) + duration
+        with self._lock:
+            self._connections += 1
+            self._connect_time += duration
+
+    def _trace(self, event, info):
+        """httpcore trace hook: time TCP+TLS setup of each new connection"""
+        if event in ("connection.connect_tcp.started", "connection.start_tls.started"):
+            self._local.started = time.perf_counter()
+        elif event == "connection.connect_tcp.complete":
+            self._record_connect(time.perf_counter() - self._local.started)
+        elif event == "connection.start_tls.complete":
+            duration = time.perf_counter() - self._local.started
+            self._local.connect += duration
+            with self._lock:
+                self._connect_time += duration
+        elif event.endswith("receive_response_headers.complete"):
+            self._local.headers_at = time.perf_counter()
+
+    def request(self, method, url, stream=False, **kwargs):
+        """Send a request over the shared pool; raises requests.exceptions.RequestException on failure.
+
+        The response carries a RequestTiming as `response.timing`. With stream=True the body
+        is left unread so the caller can consume it incrementally.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._requests += 1
+        self._local.connect = 0.0
+        self._local.headers_at = None
+        started = time.perf_counter()
+
+        if self.http2:
+            try:
+                request = self._client.build_request(method, url, extensions={"trace": self._trace}, **kwargs)
+                response = self._client.send(request, stream=True)
+                headers_at = self._local.headers_at or time.perf_counter()
+                if not stream:
+                    response.read()
+            except self._httpx.HTTPError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            request_bytes = _body_size(request.content)
+        else:
+            response = self._client.request(method, url, stream=True, **kwargs)
+            headers_at = time.perf_counter()
+            if not stream:
+                response.content
+            request_bytes = _body_size(response.request.body)
+
+        finished = time.perf_counter()
+        response_bytes = None if stream else len(response.content)
+        response.timing = RequestTiming(started, self._local.connect, headers_at, finished,
+                                        request_bytes, response_bytes)
+        return response
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        """Body chunks of a stream=True response, decoded from any Content-Encoding"""
+        if self.http2:
+            return response.iter_bytes(chunk_size)
+        return response.iter_content(chunk_size)
+
+    def iter_raw(self, response, chunk_size=64 * 1024):
+        """Body chunks of a stream=True response exactly as sent, still Content-Encoded"""
+        if self.http2:
+            return response.iter_raw(chunk_size)
+        return response.raw.stream(chunk_size, decode_content=False)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def stats(self):
+        """Connection reuse counters for the run so far"""
+        with self._lock:
+            requests_sent = self._requests
+            connections = self._connections
+            connect_time = self._connect_time
+        reused = max(requests_sent - connections, 0)
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": reused,
+            "reuse_ratio": reused / requests_sent if requests_sent else 0.0,
+            "connect_time": connect_time,
+            "protocol": "HTTP/2" if self.http2 else "HTTP/1.1",
+        }
+
+    def close(self):
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()